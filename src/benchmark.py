@@ -0,0 +1,363 @@
+import argparse
+import json
+import logging
+import multiprocessing as mp
+import platform
+import queue
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+import recordlinkage as rl
+import yaml
+
+from config_parser import ConfigParser
+from data_loader import DataLoader
+from preprocessor import Preprocessor
+from indexer import Indexer
+from comparer import Comparer
+from classifier import Classifier
+from evaluator import Evaluator
+from data_generator import SyntheticDataGenerator
+from memory_utils import PeakMemoryMonitor, peak_rss_mb
+
+STAGES = ["generate", "load", "clean", "index", "compare", "classify", "evaluate"]
+DEFAULT_SIZES = [10000, 100000, 1000000, 10000000]
+# Timings below this are dominated by noise and are not checked for regressions
+MIN_COMPARABLE_SECONDS = 0.1
+
+
+def create_config(
+    directory: Path, dataset: Dict, pair_method: str, memory_lean: bool, ingestion: bool
+) -> Path:
+    global_settings = {
+        "directory": str(directory),
+        "default_pair_method": pair_method,
+        "memory_lean": memory_lean,
+    }
+    if ingestion:
+        global_settings["ingestion"] = {"engine": "pyarrow"}
+    config_file = directory / "benchmark_config.yaml"
+    with open(config_file, "w") as file:
+        yaml.safe_dump(
+            {"global_settings": global_settings, "datasets": [dataset]}, file
+        )
+    return config_file
+
+
+def get_stages(configparser: ConfigParser, seed: int, evaluate: bool) -> List[Tuple]:
+    # Every stage gets the ds_dict of the stage before it
+    stages = [
+        ("load", lambda ds_dict: DataLoader(configparser).load_data()),
+        ("clean", lambda ds_dict: Preprocessor(configparser, ds_dict).clean_data()),
+        ("index", lambda ds_dict: Indexer(configparser, ds_dict).index_data()),
+        ("compare", lambda ds_dict: Comparer(configparser, ds_dict).compare()),
+        (
+            "classify",
+            lambda ds_dict: Classifier(
+                configparser, ds_dict, model_path=None, random_state=seed
+            ).split(),
+        ),
+    ]
+    if evaluate:
+        stages.append(
+            ("evaluate", lambda ds_dict: Evaluator(configparser, ds_dict).evaluate())
+        )
+    return stages
+
+
+def run_benchmark(
+    results: mp.Queue,
+    directory: Path,
+    number_rows: int,
+    number_tables: int,
+    args: argparse.Namespace,
+):
+    # Runs in its own process, so that the peak memory of one size does not hide the next one
+    variant = "dedup" if number_tables == 1 else "link"
+    prefix = f"synthetic_{variant}_{number_rows}"
+    generator = SyntheticDataGenerator(
+        args.duplicate_rate, args.noise_rate, args.missing_rate, args.seed
+    )
+    start = time.perf_counter()
+    dataset = generator.write(directory, prefix, number_rows, number_tables)
+    results.put(
+        {"stage": "generate", "seconds": time.perf_counter() - start, "status": "ok"}
+    )
+    configparser = ConfigParser(
+        create_config(
+            directory, dataset, args.pair_method, args.memory_lean, args.ingestion
+        )
+    )
+    ds_dict = None
+    for stage, function in get_stages(
+        configparser, args.seed, not args.skip_evaluation
+    ):
+        with PeakMemoryMonitor() as monitor:
+            start = time.perf_counter()
+            ds_dict = function(ds_dict)
+            seconds = time.perf_counter() - start
+        ds = ds_dict[prefix]
+        multi_index = ds.get("multi_index")
+        result = {
+            "stage": stage,
+            "seconds": seconds,
+            "rows_per_second": number_rows * number_tables / seconds
+            if seconds
+            else None,
+            "pairs": len(multi_index) if multi_index is not None else None,
+            "peak_rss_mb": monitor.peak_mb,
+            "status": "ok",
+        }
+        if stage == "evaluate":
+            result["evaluation"] = ds.get("evaluation")
+        results.put(result)
+    logging.info(f"Benchmark of {prefix} finished, peak RSS {peak_rss_mb():.1f} MB")
+
+
+def benchmark_size(
+    directory: Path, number_rows: int, number_tables: int, args: argparse.Namespace
+) -> List[Dict]:
+    variant = "dedup" if number_tables == 1 else "link"
+    # Spawn instead of fork, so the memory of the parent is not counted in the child
+    context = mp.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(
+        target=run_benchmark,
+        args=(results, directory, number_rows, number_tables, args),
+    )
+    process.start()
+    deadline = time.monotonic() + args.timeout if args.timeout else None
+    stage_results = []
+    timed_out = False
+    while True:
+        try:
+            stage_results.append(results.get(timeout=1))
+            continue
+        except queue.Empty:
+            pass
+        if not process.is_alive():
+            break
+        if deadline is not None and time.monotonic() > deadline:
+            logging.warning(
+                f"Benchmark of {variant} with {number_rows} rows timed out after {args.timeout}s"
+            )
+            process.terminate()
+            timed_out = True
+            break
+    process.join()
+    # Results put right before the child exited or was stopped are still in the queue
+    while True:
+        try:
+            stage_results.append(results.get_nowait())
+        except queue.Empty:
+            break
+    # Stages that did not report were either cut off by the timeout or failed, e.g. ran out of memory
+    finished_stages = {result["stage"] for result in stage_results}
+    for stage in STAGES:
+        if args.skip_evaluation and stage == "evaluate":
+            continue
+        if stage not in finished_stages:
+            stage_results.append(
+                {"stage": stage, "status": "timeout" if timed_out else "failed"}
+            )
+    for result in stage_results:
+        result.update(variant=variant, rows=number_rows, tables=number_tables)
+        if result["status"] == "ok" and "peak_rss_mb" in result:
+            print(
+                f"{variant:>6} {number_rows:>10} {result['stage']:>9} {result['seconds']:>10.2f}s "
+                f"{result['peak_rss_mb']:>10.1f} MB"
+            )
+        else:
+            print(
+                f"{variant:>6} {number_rows:>10} {result['stage']:>9} {result['status']:>11}"
+            )
+    return stage_results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def find_regressions(
+    results: List[Dict], baseline: Dict, tolerance: float
+) -> List[str]:
+    baseline_results = {
+        (result["variant"], result["rows"], result["stage"]): result
+        for result in baseline.get("results", [])
+    }
+    regressions = []
+    for result in results:
+        key = (result["variant"], result["rows"], result["stage"])
+        previous = baseline_results.get(key)
+        if previous is None:
+            continue
+        if previous.get("status") == "ok" and result.get("status") != "ok":
+            regressions.append(f"{key}: {result.get('status')}")
+            continue
+        if result.get("status") != "ok" or previous.get("status") != "ok":
+            continue
+        for metric in ["seconds", "peak_rss_mb"]:
+            if result.get(metric) is None or previous.get(metric) is None:
+                continue
+            if metric == "seconds" and previous[metric] < MIN_COMPARABLE_SECONDS:
+                continue
+            if result[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{key}: {metric} {previous[metric]:.2f} -> {result[metric]:.2f}"
+                )
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the pipeline stages on synthetic datasets of growing size"
+    )
+    parser.add_argument(
+        "--sizes",
+        default=DEFAULT_SIZES,
+        type=int,
+        nargs="+",
+        help="Number of rows per table",
+    )
+    parser.add_argument(
+        "--tables",
+        default=[1, 2],
+        type=int,
+        nargs="+",
+        choices=[1, 2],
+        help="1: deduplication of one table, 2: linkage of two tables",
+    )
+    parser.add_argument(
+        "--duplicate-rate",
+        default=0.1,
+        type=float,
+        help="Share of rows that are duplicates",
+    )
+    parser.add_argument(
+        "--noise-rate",
+        default=0.3,
+        type=float,
+        help="Probability that a column of a duplicate is perturbed",
+    )
+    parser.add_argument(
+        "--missing-rate",
+        default=0.02,
+        type=float,
+        help="Probability that a column of a duplicate is missing",
+    )
+    parser.add_argument(
+        "--pair-method", default="sortedneighbourhood", type=str, help="Pair method"
+    )
+    parser.add_argument("--seed", default=42, type=int, help="Seed of data and splits")
+    parser.add_argument(
+        "--memory-lean", action="store_true", help="Run with memory_lean enabled"
+    )
+    parser.add_argument(
+        "--ingestion",
+        action="store_true",
+        help="Load the tables with the chunked pyarrow ingestion",
+    )
+    parser.add_argument(
+        "--skip-evaluation", action="store_true", help="Do not run the Evaluator"
+    )
+    parser.add_argument(
+        "--timeout",
+        default=3600,
+        type=float,
+        help="Seconds after which a run of one size is stopped, 0 for no limit",
+    )
+    parser.add_argument(
+        "--data-dir",
+        default=None,
+        type=str,
+        help="Directory for the generated data, default: a temporary directory that is removed afterwards",
+    )
+    parser.add_argument(
+        "--output",
+        default="benchmark_results.json",
+        type=str,
+        help="Path of the JSON results",
+    )
+    parser.add_argument(
+        "--baseline",
+        default=None,
+        type=str,
+        help="JSON results of an earlier run to check for regressions",
+    )
+    parser.add_argument(
+        "--tolerance",
+        default=0.2,
+        type=float,
+        help="Allowed relative increase of time and memory over the baseline",
+    )
+    return parser.parse_args()
+
+
+def main():
+    logging.basicConfig(
+        format="%(asctime)s - %(levelname)s - %(message)s", level=logging.WARNING
+    )
+    args = parse_args()
+    data_dir = Path(args.data_dir or tempfile.mkdtemp(prefix="benchmark_")).resolve()
+    results = []
+    try:
+        for number_tables in args.tables:
+            for number_rows in args.sizes:
+                directory = data_dir / f"{number_tables}_{number_rows}"
+                results.extend(
+                    benchmark_size(directory, number_rows, number_tables, args)
+                )
+                if args.data_dir is None:
+                    shutil.rmtree(directory, ignore_errors=True)
+    finally:
+        if args.data_dir is None:
+            shutil.rmtree(data_dir, ignore_errors=True)
+    settings = {
+        key: value
+        for key, value in vars(args).items()
+        if key not in ["output", "baseline", "data_dir"]
+    }
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "recordlinkage": rl.__version__,
+        "platform": platform.platform(),
+        "settings": settings,
+        "results": results,
+    }
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Results saved to {args.output}")
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = find_regressions(results, baseline, args.tolerance)
+        print(
+            f"Compared to commit {baseline.get('commit')}: {len(regressions)} regressions"
+        )
+        for regression in regressions:
+            print(f"  {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
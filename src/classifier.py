@@ -1,6 +1,8 @@
 from configparser import ConfigParser
-from typing import Dict, Tuple, List, Set
+from pathlib import Path
+from typing import Dict, Tuple, List, Set, Optional
 import networkx as nx
+import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
 import recordlinkage as rl
@@ -8,11 +10,19 @@ import joblib
 
 
 class Classifier:
-    def __init__(self, configparser: ConfigParser, ds_dict: Dict[str, Dict]):
+    def __init__(
+        self,
+        configparser: ConfigParser,
+        ds_dict: Dict[str, Dict],
+        model_path: Optional[str] = "svm_record_linkage_model.pkl",
+        random_state: Optional[int] = None,
+    ):
         self.configparser = configparser
         self.ds_dict = ds_dict
+        self.model_path = model_path  # None: keep the model in memory only
+        self.random_state = random_state
 
-    def split(self):
+    def split(self) -> Dict[str, Dict]:
         for ds_id, ds in self.ds_dict.items():
             tables = ds.get("tables")
             df1 = tables[0]
@@ -24,7 +34,9 @@ class Classifier:
 
             pairs = list(gold_standard.to_records(index=False))
             clusters = self.create_transitive_clusters(pairs)
-            train_ids, val_ids, test_ids = self.split_clusters(clusters)
+            train_ids, test_ids, val_ids = self.split_clusters(
+                clusters, self.random_state
+            )
 
             similarity_scores = ds.get("similarity_scores")
             similarity_scores = self.sort_similarity_scores(similarity_scores)
@@ -32,9 +44,26 @@ class Classifier:
                 train_similarity_matrix,
                 common_indices,
             ) = self.create_train_similarity_matrix(
-                df1, train_ids, pairs, similarity_scores
+                df1, train_ids, pairs, similarity_scores, self.random_state
             )
-            self.train_and_save_model(train_similarity_matrix, common_indices)
+            classifier = self.train_and_save_model(
+                train_similarity_matrix,
+                common_indices,
+                self.get_model_path(self.model_path, ds_id),
+            )
+            self.ds_dict[ds_id]["classifier"] = classifier
+            self.ds_dict[ds_id]["train_ids"] = train_ids
+            self.ds_dict[ds_id]["val_ids"] = val_ids
+            self.ds_dict[ds_id]["test_ids"] = test_ids
+        return self.ds_dict
+
+    @staticmethod
+    def get_model_path(model_path: Optional[str], ds_id: str) -> Optional[Path]:
+        # One model per dataset, e.g. hpi_cora_svm_record_linkage_model.pkl
+        if not model_path:
+            return None
+        model_path = Path(model_path)
+        return model_path.with_name(f"{ds_id}_{model_path.name}")
 
     @staticmethod
     def create_transitive_clusters(pairs: List[Tuple[int, int]]) -> List[Set[int]]:
@@ -43,10 +72,14 @@ class Classifier:
         return list(nx.connected_components(graph))
 
     @staticmethod
-    def split_clusters(clusters: List[Set[int]]) -> Tuple[Set[int], Set[int], Set[int]]:
-        train_clusters, test_val_clusters = train_test_split(clusters, test_size=0.3)
+    def split_clusters(
+        clusters: List[Set[int]], random_state: Optional[int] = None
+    ) -> Tuple[Set[int], Set[int], Set[int]]:
+        train_clusters, test_val_clusters = train_test_split(
+            clusters, test_size=0.3, random_state=random_state
+        )
         test_clusters, val_clusters = train_test_split(
-            test_val_clusters, test_size=1 / 3
+            test_val_clusters, test_size=1 / 3, random_state=random_state
         )
         return (
             set().union(*train_clusters),
@@ -56,21 +89,13 @@ class Classifier:
 
     @staticmethod
     def sort_similarity_scores(similarity_scores: pd.DataFrame) -> pd.DataFrame:
-        def sort_index_pairs(index):
-            return pd.MultiIndex.from_tuples([tuple(sorted(pair)) for pair in index])
-
-        sorted_index = sort_index_pairs(similarity_scores.index)
-        sorted_similarity_scores = pd.DataFrame(
-            index=sorted_index, columns=similarity_scores.columns
+        # Order every pair as (smaller, larger) and keep the scores and their dtypes
+        first = similarity_scores.index.get_level_values(0)
+        second = similarity_scores.index.get_level_values(1)
+        sorted_index = pd.MultiIndex.from_arrays(
+            [np.minimum(first, second), np.maximum(first, second)]
         )
-
-        # Populate the new DataFrame with data from the original DataFrame
-        for idx in sorted_similarity_scores.index:
-            if idx in similarity_scores.index:
-                sorted_similarity_scores.loc[idx] = similarity_scores.loc[idx]
-            elif idx[::-1] in similarity_scores.index:
-                sorted_similarity_scores.loc[idx] = similarity_scores.loc[idx[::-1]]
-        return sorted_similarity_scores
+        return similarity_scores.set_axis(sorted_index, axis=0)
 
     @staticmethod
     def create_train_similarity_matrix(
@@ -78,6 +103,7 @@ class Classifier:
         train_ids: Set[int],
         pairs: List[Tuple[int, int]],
         similarity_scores: pd.DataFrame,
+        random_state: Optional[int] = None,
     ) -> tuple:
         indices_to_retrieve = [
             (df[df["id"] == id1].index[0], df[df["id"] == id2].index[0])
@@ -93,7 +119,7 @@ class Classifier:
         # Filter the DataFrame to keep only rows with indices in the intersection
         similarity_scores_train_true_matches = similarity_scores.loc[common_indices]
 
-        mask = similarity_scores.index.map(lambda x: (x[0], x[1]) not in multi_index)
+        mask = ~similarity_scores.index.isin(multi_index)
 
         # Apply the mask to the DataFrame
         similarity_scores_filtered = similarity_scores[
@@ -101,19 +127,25 @@ class Classifier:
         ]  # that are not true matches
 
         train_idx_non_matches, test_val_non_matches = train_test_split(
-            similarity_scores_filtered.index, test_size=0.3
+            similarity_scores_filtered.index, test_size=0.3, random_state=random_state
         )
 
         train_non_matches = similarity_scores_filtered.loc[train_idx_non_matches]
 
         train_similarity_matrix = pd.concat(
             [similarity_scores_train_true_matches, train_non_matches]
-        ).sample(frac=1)
+        ).sample(frac=1, random_state=random_state)
 
         return train_similarity_matrix, common_indices
 
     @staticmethod
-    def train_and_save_model(train_similarity_matrix: pd.DataFrame, common_indices):
+    def train_and_save_model(
+        train_similarity_matrix: pd.DataFrame,
+        common_indices,
+        model_path: Optional[Path] = None,
+    ) -> rl.SVMClassifier:
         classifier = rl.SVMClassifier()
         classifier.fit(train_similarity_matrix, common_indices)
-        joblib.dump(classifier, "svm_record_linkage_model.pkl")
+        if model_path:
+            joblib.dump(classifier, model_path)
+        return classifier
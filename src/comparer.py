@@ -1,10 +1,13 @@
 import logging
 from configparser import ConfigParser
-from typing import Dict
+from typing import Dict, List
 
 import recordlinkage as rl
 import pandas as pd
 
+from memory_utils import compact_features
+from preprocessor import is_text_column
+
 
 class Comparer:
     def __init__(
@@ -17,7 +20,6 @@ class Comparer:
 
     def compare(self) -> Dict[str, Dict]:
         for ds_id, ds in self.ds_dict.items():
-            compare_obj = rl.Compare()
             similarity_string_measure = self.set_similarity_measure(
                 self.configparser.default_similarity_string_measure,
                 ds.get("similarity_measures"),
@@ -38,45 +40,39 @@ class Comparer:
             if len(tables) == 2:
                 df2 = tables[1]
                 threshold = int(min(len(df1.columns), len(df2.columns)) * threshold)
-                for col in df1.columns.intersection(
-                    df2.columns
-                ):  # Only compare columns that are in both tables
-                    self.compare_columns(
-                        compare_obj,
-                        df1,
-                        col,
-                        similarity_string_measure
-                        if pd.api.types.is_string_dtype(df1[col])
-                        else similarity_numeric_measure,
-                    )
+                compare_obj = self.create_compare_obj(
+                    df1,
+                    df1.columns.intersection(
+                        df2.columns
+                    ),  # Only compare columns that are in both tables
+                    similarity_string_measure,
+                    similarity_numeric_measure,
+                )
                 features = compare_obj.compute(ds.get("multi_index"), df1, df2)
             else:
                 threshold = int(len(df1.columns) * threshold)
-                for col in df1.columns:
-                    self.compare_columns(
-                        compare_obj,
-                        df1,
-                        col,
-                        similarity_string_measure
-                        if pd.api.types.is_string_dtype(df1[col])
-                        else similarity_numeric_measure,
-                    )
+                compare_obj = self.create_compare_obj(
+                    df1,
+                    df1.columns,
+                    similarity_string_measure,
+                    similarity_numeric_measure,
+                )
                 features = compare_obj.compute(ds.get("multi_index"), df1)
             logging.info(
                 f"Chosen threshold for summed features: {threshold} out of {len(features.columns)}"
             )
+            if self.configparser.memory_lean:
+                features = compact_features(features)
             # matches = features[features.sum(axis=1) > threshold]
             # use matches instead of features to get more refined results
             self.ds_dict[ds_id]["similarity_scores"] = features  # Similarity matrix
             # Assuming there is an id column in all tables
             # Map the indices of the matches to the actual IDs
-            self.ds_dict[ds_id]["matched_ids"] = features.index.map(
-                lambda idx: (
-                    df1["id"].iloc[idx[0]],
-                    df2["id"].iloc[idx[1]]
-                    if len(tables) == 2
-                    else df1["id"].iloc[idx[1]],
-                )
+            self.ds_dict[ds_id]["matched_ids"] = pd.MultiIndex.from_arrays(
+                [
+                    df1["id"].to_numpy()[features.index.get_level_values(0)],
+                    tables[-1]["id"].to_numpy()[features.index.get_level_values(1)],
+                ]
             )
 
         return self.ds_dict
@@ -91,11 +87,30 @@ class Comparer:
             else default_measure
         )
 
+    @staticmethod
+    def create_compare_obj(
+        df: pd.DataFrame,
+        columns: List[str],
+        similarity_string_measure: str,
+        similarity_numeric_measure: str,
+    ) -> rl.Compare:
+        compare_obj = rl.Compare()
+        for col in columns:
+            Comparer.compare_columns(
+                compare_obj,
+                df,
+                col,
+                similarity_string_measure
+                if is_text_column(df[col])
+                else similarity_numeric_measure,
+            )
+        return compare_obj
+
     @staticmethod
     def compare_columns(
         compare_obj: rl.Compare, df: pd.DataFrame, col: str, similarity_measure: str
     ):
-        if pd.api.types.is_string_dtype(df[col]):
+        if is_text_column(df[col]):
             if similarity_measure == "exact":  # String / Text
                 compare_obj.exact(col, col, label=col)
             else:
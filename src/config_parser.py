@@ -32,6 +32,9 @@ class ConfigParser:
         self.default_similarity_numeric_measure = self.global_settings.get(
             "default_similarity_measures", {}
         ).get("numeric", "linear")
+        self.sweep = self.global_settings.get("sweep", None)
+        self.memory_lean = self.global_settings.get("memory_lean", False)
+        self.ingestion = self.global_settings.get("ingestion", None)
         self.datasets = self.config["datasets"]
         self.check_values()
 
@@ -47,6 +50,18 @@ class ConfigParser:
                         "default_phonetic_method": {"type": "string"},
                         "default_pair_method": {"type": "string"},
                         "number_indexing_keys": {"type": "integer"},
+                        "memory_lean": {"type": "boolean"},
+                        "ingestion": {
+                            "type": "object",
+                            "properties": {
+                                "engine": {
+                                    "type": "string",
+                                    "enum": ["pyarrow", "pandas"],
+                                },
+                                "block_size_mb": {"type": "number"},
+                                "sample_rows": {"type": "integer"},
+                            },
+                        },
                         "default_similarity_measures": {
                             "type": "object",
                             "properties": {
@@ -54,6 +69,38 @@ class ConfigParser:
                                 "numeric": {"type": "string"},
                             },
                         },
+                        "sweep": {
+                            "type": "object",
+                            "properties": {
+                                "phonetic_method": {
+                                    "type": "array",
+                                    "items": {"type": ["string", "null"]},
+                                },
+                                "pair_method": {
+                                    "type": "array",
+                                    "items": {"type": "string"},
+                                },
+                                "number_indexing_keys": {
+                                    "type": "array",
+                                    "items": {"type": "integer"},
+                                },
+                                "similarity_measures": {
+                                    "type": "object",
+                                    "properties": {
+                                        "string": {
+                                            "type": "array",
+                                            "items": {"type": "string"},
+                                        },
+                                        "numeric": {
+                                            "type": "array",
+                                            "items": {"type": "string"},
+                                        },
+                                    },
+                                },
+                                "max_workers": {"type": "integer"},
+                                "random_state": {"type": "integer"},
+                            },
+                        },
                     },
                     "required": ["directory"],
                 },
@@ -71,6 +118,22 @@ class ConfigParser:
                             "key_column": {"type": "string"},
                             "gold_standard": {"type": "string"},
                             "candidate_set": {"type": "string"},
+                            "table_schemas": {
+                                "type": "object",
+                                "additionalProperties": {
+                                    "type": "object",
+                                    "properties": {
+                                        "columns": {
+                                            "type": "array",
+                                            "items": {"type": "string"},
+                                        },
+                                        "dtypes": {
+                                            "type": "object",
+                                            "additionalProperties": {"type": "string"},
+                                        },
+                                    },
+                                },
+                            },
                             "similarity_measures": {
                                 "type": "object",
                                 "properties": {
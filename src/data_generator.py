@@ -0,0 +1,224 @@
+import logging
+import string
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+# fmt: off
+FIRST_NAMES = [
+    "anna", "ben", "clara", "david", "emma", "felix", "greta", "hannah", "jonas", "julia",
+    "karl", "lara", "leon", "lina", "lukas", "marie", "max", "mia", "noah", "paul",
+    "sophie", "tim", "vera", "yusuf", "zoe", "ahmed", "bruno", "chen", "diego", "elif",
+    "fatima", "giulia", "hugo", "ines", "jan", "kim", "lea", "malte", "nina", "oskar",
+]
+LAST_NAMES = [
+    "müller", "schmidt", "schneider", "fischer", "weber", "meyer", "wagner", "becker", "schulz",
+    "hoffmann", "schäfer", "koch", "bauer", "richter", "klein", "wolf", "schröder", "neumann",
+    "schwarz", "zimmermann", "braun", "krüger", "hofmann", "hartmann", "lange", "schmitt",
+    "werner", "schmitz", "krause", "meier", "lehmann", "schmid", "schulze", "maier", "köhler",
+    "herrmann", "könig", "walter", "mayer", "huber", "kaiser", "fuchs", "peters", "lang",
+]
+STREETS = [
+    "hauptstraße", "schulstraße", "gartenstraße", "bahnhofstraße", "dorfstraße", "bergstraße",
+    "birkenweg", "lindenstraße", "kirchstraße", "waldstraße", "ringstraße", "schillerstraße",
+    "goethestraße", "jahnstraße", "am markt", "rosenweg", "feldweg", "friedhofstraße",
+]
+CITIES = [
+    "berlin", "hamburg", "münchen", "köln", "frankfurt", "stuttgart", "düsseldorf", "leipzig",
+    "dortmund", "essen", "bremen", "dresden", "hannover", "nürnberg", "potsdam", "kiel",
+]
+# fmt: on
+
+# Column name -> column type, the type decides how values are generated and perturbed
+COLUMN_TYPES = {
+    "name": "text",
+    "street": "text",
+    "city": "category",
+    "zip": "integer",
+    "birth_year": "integer",
+    "income": "numeric",
+}
+
+
+class SyntheticDataGenerator:
+    """Generates person tables with known duplicates and a gold standard.
+
+    Duplicates are copies of original records with per column type noise: typos, swapped tokens and
+    abbreviations for text, misspellings for categories, off-by-one values for integers and relative
+    gaussian noise for numbers. Any column of a duplicate can also be missing.
+    """
+
+    def __init__(
+        self,
+        duplicate_rate: float = 0.1,
+        noise_rate: float = 0.3,
+        missing_rate: float = 0.02,
+        seed: int = 42,
+    ):
+        self.duplicate_rate = duplicate_rate
+        self.noise_rate = noise_rate
+        self.missing_rate = missing_rate
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+
+    def generate_records(self, number_rows: int) -> pd.DataFrame:
+        rng = self.rng
+        first_names = np.array(FIRST_NAMES, dtype=object)[
+            rng.integers(0, len(FIRST_NAMES), number_rows)
+        ]
+        last_names = np.array(LAST_NAMES, dtype=object)[
+            rng.integers(0, len(LAST_NAMES), number_rows)
+        ]
+        streets = np.array(STREETS, dtype=object)[
+            rng.integers(0, len(STREETS), number_rows)
+        ]
+        house_numbers = rng.integers(1, 200, number_rows).astype(str).astype(object)
+        return pd.DataFrame(
+            {
+                "name": first_names + " " + last_names,
+                "street": streets + " " + house_numbers,
+                "city": np.array(CITIES, dtype=object)[
+                    rng.integers(0, len(CITIES), number_rows)
+                ],
+                "zip": rng.integers(10000, 99999, number_rows),
+                "birth_year": rng.integers(1940, 2006, number_rows),
+                "income": np.round(rng.lognormal(10.5, 0.5, number_rows), 2),
+            }
+        )
+
+    def add_noise(self, df: pd.DataFrame) -> pd.DataFrame:
+        rng = self.rng
+        df = df.copy()
+        for col, column_type in COLUMN_TYPES.items():
+            noisy = rng.random(len(df)) < self.noise_rate
+            positions = np.flatnonzero(noisy)
+            if column_type == "text":
+                values = df[col].to_numpy(dtype=object)
+                values[positions] = [self.perturb_text(values[i]) for i in positions]
+                df[col] = values
+            elif column_type == "category":
+                values = df[col].to_numpy(dtype=object)
+                values[positions] = [self.typo(values[i]) for i in positions]
+                df[col] = values
+            elif column_type == "integer":
+                values = df[col].to_numpy().copy()
+                values[positions] += rng.choice([-1, 1], len(positions))
+                df[col] = values
+            elif column_type == "numeric":
+                values = df[col].to_numpy().copy()
+                values[positions] *= 1 + rng.normal(0, 0.05, len(positions))
+                df[col] = np.round(values, 2)
+            missing = np.flatnonzero(rng.random(len(df)) < self.missing_rate)
+            if len(missing):
+                df[col] = df[col].astype(object if column_type != "numeric" else float)
+                df.iloc[missing, df.columns.get_loc(col)] = None
+        return df
+
+    def perturb_text(self, value: str) -> str:
+        action = self.rng.integers(0, 3)
+        tokens = value.split(" ")
+        if action == 0 and len(tokens) > 1:
+            # Swapped tokens, e.g. last name first
+            tokens = tokens[::-1]
+            return " ".join(tokens)
+        if action == 1 and len(tokens) > 1:
+            # Abbreviated first token
+            tokens[0] = tokens[0][0] + "."
+            return " ".join(tokens)
+        return self.typo(value)
+
+    def typo(self, value: str) -> str:
+        if not value:
+            return value
+        rng = self.rng
+        position = int(rng.integers(0, len(value)))
+        head = value[:position]
+        tail = value[position:][1:]
+        letter = string.ascii_lowercase[rng.integers(0, 26)]
+        action = rng.integers(0, 4)
+        if action == 0:  # Insertion
+            return head + letter + value[position:]
+        if action == 1 and len(value) > 1:  # Deletion
+            return head + tail
+        if action == 2 and tail:  # Transposition
+            return head + tail[0] + value[position] + tail[1:]
+        return head + letter + tail  # Substitution
+
+    def generate_dedup(self, number_rows: int) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        # One table in which duplicate_rate of all rows are noisy copies of other rows
+        number_duplicates = int(number_rows * self.duplicate_rate)
+        originals = self.generate_records(number_rows - number_duplicates)
+        sources = self.rng.integers(0, len(originals), number_duplicates)
+        duplicates = self.add_noise(originals.iloc[sources].reset_index(drop=True))
+        df = pd.concat([originals, duplicates], ignore_index=True)
+        cluster = np.concatenate([np.arange(len(originals)), sources])
+        # Shuffle so that duplicates are not grouped at the end of the table
+        order = self.rng.permutation(len(df))
+        df = df.iloc[order].reset_index(drop=True)
+        cluster = cluster[order]
+        df.insert(0, "id", np.arange(len(df)))
+        return df, self.cluster_pairs(df["id"].to_numpy(), cluster, ["p1", "p2"])
+
+    def generate_link(
+        self, number_rows: int
+    ) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        # Two tables of number_rows rows each, duplicate_rate of the right rows match a left row
+        left = self.generate_records(number_rows)
+        number_matches = int(number_rows * self.duplicate_rate)
+        sources = self.rng.choice(number_rows, number_matches, replace=False)
+        matches = self.add_noise(left.iloc[sources].reset_index(drop=True))
+        right = pd.concat(
+            [matches, self.generate_records(number_rows - number_matches)],
+            ignore_index=True,
+        )
+        order = self.rng.permutation(len(right))
+        right = right.iloc[order].reset_index(drop=True)
+        left.insert(0, "id", np.arange(number_rows))
+        right.insert(0, "id", np.arange(number_rows, 2 * number_rows))
+        # Position in right of the i-th match
+        match_positions = np.argsort(order)[:number_matches]
+        gold_standard = pd.DataFrame(
+            {
+                "ltable.id": left["id"].to_numpy()[sources],
+                "rtable.id": right["id"].to_numpy()[match_positions],
+            }
+        )
+        return left, right, gold_standard
+
+    @staticmethod
+    def cluster_pairs(
+        ids: np.ndarray, cluster: np.ndarray, columns: List[str]
+    ) -> pd.DataFrame:
+        # All pairs within a cluster, clusters with more than one duplicate give more than one pair
+        members = pd.DataFrame({"cluster": cluster, "id": ids})
+        members = members[members["cluster"].duplicated(keep=False)]
+        pairs = members.merge(members, on="cluster")
+        pairs = pairs[pairs["id_x"] < pairs["id_y"]]
+        return pd.DataFrame(
+            {columns[0]: pairs["id_x"].to_numpy(), columns[1]: pairs["id_y"].to_numpy()}
+        )
+
+    def write(
+        self, directory: Path, prefix: str, number_rows: int, number_tables: int
+    ) -> Dict:
+        """Writes the tables and gold standard as csv files and returns a dataset entry for the config."""
+        directory.mkdir(parents=True, exist_ok=True)
+        if number_tables == 1:
+            df, gold_standard = self.generate_dedup(number_rows)
+            tables = {f"{prefix}.csv": df}
+        else:
+            left, right, gold_standard = self.generate_link(number_rows)
+            tables = {f"{prefix}_left.csv": left, f"{prefix}_right.csv": right}
+        for table_name, df in tables.items():
+            df.to_csv(directory / table_name, index=False)
+        gold_standard.to_csv(directory / f"{prefix}_goldstandard.csv", index=False)
+        logging.info(
+            f"Generated {prefix} with {number_rows} rows per table and {len(gold_standard)} gold standard pairs"
+        )
+        return {
+            "id": prefix,
+            "tables": list(tables),
+            "gold_standard": f"{prefix}_goldstandard.csv",
+        }
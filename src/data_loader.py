@@ -1,12 +1,21 @@
 import concurrent.futures as cf
 import logging
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 
 import pandas as pd
 import requests
 
 from config_parser import ConfigParser
+from ingestion import Ingestor, split_datetime_dtypes
+from memory_utils import (
+    PeakMemoryMonitor,
+    compact_df,
+    frame_memory_mb,
+    infer_lean_dtypes,
+)
+
+LEAN_SAMPLE_ROWS = 10000
 
 
 class DataLoader:
@@ -29,9 +38,10 @@ class DataLoader:
                 ): ds
                 for ds in self.configparser.datasets
             }
-            for future in cf.as_completed(future_to_ds):
+            # Keep the order of the config, the results are matched to it below
+            for future in future_to_ds:
                 datasets.append(future.result())
-            for future in cf.as_completed(future_to_gs):
+            for future in future_to_gs:
                 gold_standards.append(future.result())
         for ds_info, ds, gs in zip(
             self.configparser.datasets, datasets, gold_standards
@@ -91,17 +101,67 @@ class DataLoader:
                 logging.info(f"Loading table {table} for dataset {ds_id}")
                 file = Path(self.configparser.data_dir) / table
 
-            return self.load_dataset(file)
+            table_schema = self.get_table_schema(table, ds_id)
+            # Tables are loaded concurrently, the RSS is the one of the whole process
+            with PeakMemoryMonitor() as monitor:
+                if self.configparser.ingestion is not None:
+                    df = Ingestor(self.configparser).load(
+                        file, table_schema.get("columns"), table_schema.get("dtypes")
+                    )
+                else:
+                    df = self.load_dataset(
+                        file,
+                        table_schema.get("columns"),
+                        table_schema.get("dtypes"),
+                        self.configparser.memory_lean,
+                    )
+                if self.configparser.memory_lean:
+                    memory_before = frame_memory_mb(df)
+                    df = compact_df(df)
+                    logging.info(
+                        f"Compacted table {table} of dataset {ds_id} from {memory_before:.1f} MB "
+                        f"to {frame_memory_mb(df):.1f} MB"
+                    )
+            logging.info(
+                f"Loaded table {table} of dataset {ds_id} ({frame_memory_mb(df):.1f} MB), RSS "
+                f"{monitor.start_mb:.1f} MB before and {monitor.peak_mb:.1f} MB at the peak"
+            )
+            return df
         except Exception as e:
             logging.error(f"Error in load_single_table: {e}")
             raise
 
+    def get_table_schema(self, table: str, ds_id: str) -> Dict:
+        for ds in self.configparser.datasets:
+            if ds.get("id") == ds_id:
+                return ds.get("table_schemas", {}).get(table, {})
+        return {}
+
     @staticmethod
-    def load_dataset(filename: str) -> pd.DataFrame:
+    def load_dataset(
+        filename: str,
+        columns: Optional[List[str]] = None,
+        dtypes: Optional[Dict[str, str]] = None,
+        memory_lean: bool = False,
+    ) -> pd.DataFrame:
         try:
             if not Path(filename).exists():
                 raise FileNotFoundError(f"{filename} does not exist")
-            df = pd.read_csv(filename)
+            if columns and "id" not in columns:
+                # The id column is needed to map gold standards and candidate sets to the records
+                header = pd.read_csv(filename, nrows=0).columns
+                columns = ["id"] + columns if "id" in header else columns
+            if memory_lean:
+                # Dtypes are chosen from a sample, so that the full table is not parsed as objects first
+                sample = pd.read_csv(filename, nrows=LEAN_SAMPLE_ROWS, usecols=columns)
+                dtypes = {**infer_lean_dtypes(sample), **(dtypes or {})}
+            dtypes, datetime_columns = split_datetime_dtypes(dtypes)
+            df = pd.read_csv(
+                filename,
+                usecols=columns,
+                dtype=dtypes or None,
+                parse_dates=datetime_columns or None,
+            )
             return df
         except Exception as e:
             logging.error(f"Error in load_dataset: {e}")
@@ -0,0 +1,189 @@
+import logging
+import time
+from configparser import ConfigParser
+from typing import Dict, Set, Optional
+
+import numpy as np
+import pandas as pd
+
+
+def encode_pairs(
+    first: np.ndarray, second: np.ndarray, number_rows: int, dedup: bool
+) -> np.ndarray:
+    # Encode a pair of row positions as a single int64, in deduplication (a, b) and (b, a) are the same pair
+    first = first.astype(np.int64, copy=False)
+    second = second.astype(np.int64, copy=False)
+    if dedup:
+        first, second = np.minimum(first, second), np.maximum(first, second)
+    return first * np.int64(number_rows) + second
+
+
+def sorted_membership(
+    codes: np.ndarray, sorted_codes: np.ndarray, number_rows: int
+) -> np.ndarray:
+    # Binary search codes in a sorted set instead of hashing tuples, but only codes whose first
+    # record starts a pair of the set: a cheap lookup that skips most of a large candidate set
+    membership = np.zeros(len(codes), dtype=bool)
+    if len(sorted_codes) == 0:
+        return membership
+    number_rows = np.int64(number_rows)
+    has_pairs = np.zeros(int(sorted_codes[-1] // number_rows) + 1, dtype=bool)
+    has_pairs[sorted_codes // number_rows] = True
+    first = codes // number_rows
+    candidates = np.flatnonzero(has_pairs[np.clip(first, 0, len(has_pairs) - 1)])
+    candidate_codes = codes[candidates]
+    positions = np.searchsorted(sorted_codes, candidate_codes)
+    positions[positions == len(sorted_codes)] = 0
+    membership[candidates] = sorted_codes[positions] == candidate_codes
+    return membership
+
+
+def sorted_intersection_size(
+    codes: np.ndarray, sorted_codes: np.ndarray, number_rows: int
+) -> int:
+    # The unique on the (small) matched subset guards against duplicate pairs in codes
+    return len(np.unique(codes[sorted_membership(codes, sorted_codes, number_rows)]))
+
+
+def precision_recall_f1(true_positives: int, predicted: int, actual: int) -> Dict:
+    precision = true_positives / predicted if predicted else 0.0
+    recall = true_positives / actual if actual else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {"precision": precision, "recall": recall, "f1": f1}
+
+
+class Evaluator:
+    def __init__(
+        self, configparser: ConfigParser = None, ds_dict: Dict[str, Dict] = None
+    ):
+        self.configparser = configparser
+        self.ds_dict = ds_dict
+
+    def evaluate(self) -> Dict[str, Dict]:
+        for ds_id, ds in self.ds_dict.items():
+            start = time.perf_counter()
+            tables = ds.get("tables")
+            dedup = len(tables) == 1
+            number_rows = len(tables[-1])
+            gold_codes = self.encode_gold_standard(ds_id, ds)
+            evaluation = {
+                "blocking": self.evaluate_blocking(ds, gold_codes, dedup, number_rows)
+            }
+            if ds.get("classifier") is not None:
+                predicted_codes = np.unique(
+                    self.encode_multi_index(
+                        ds.get("classifier").predict(ds.get("similarity_scores")), ds
+                    )
+                )
+                for split in ["val", "test"]:
+                    evaluation[split] = self.evaluate_split(
+                        ds, predicted_codes, gold_codes, ds.get(f"{split}_ids")
+                    )
+            self.ds_dict[ds_id]["evaluation"] = evaluation
+            logging.info(
+                f"Evaluation of dataset {ds_id} in {time.perf_counter() - start:.2f}s: {evaluation}"
+            )
+        return self.ds_dict
+
+    def evaluate_blocking(
+        self, ds: Dict, gold_codes: np.ndarray, dedup: bool, number_rows: int
+    ) -> Dict:
+        multi_index = ds.get("multi_index")
+        # A candidate set can hold a pair twice, e.g. as (a, b) and (b, a) in deduplication
+        candidate_codes = np.unique(self.encode_multi_index(multi_index, ds))
+        number_candidates = len(candidate_codes)
+        true_positives = sorted_intersection_size(
+            candidate_codes, gold_codes, number_rows
+        )
+        tables = ds.get("tables")
+        if dedup:
+            total_pairs = number_rows * (number_rows - 1) // 2
+        else:
+            total_pairs = len(tables[0]) * len(tables[1])
+        return {
+            "candidate_pairs": number_candidates,
+            "gold_pairs": len(gold_codes),
+            "pair_completeness": true_positives / len(gold_codes)
+            if len(gold_codes)
+            else 0.0,
+            "reduction_ratio": 1 - number_candidates / total_pairs
+            if total_pairs
+            else 0.0,
+            "pair_quality": true_positives / number_candidates
+            if number_candidates
+            else 0.0,
+        }
+
+    def evaluate_split(
+        self,
+        ds: Dict,
+        predicted_codes: np.ndarray,
+        gold_codes: np.ndarray,
+        split_ids: Optional[Set[int]],
+    ) -> Dict:
+        if not split_ids:
+            return {}
+        df = ds.get("tables")[0]
+        # Only pairs with both records inside the split clusters belong to the split
+        in_split = np.zeros(len(df), dtype=bool)
+        positions = pd.Index(df["id"]).get_indexer(list(split_ids))
+        in_split[positions[positions >= 0]] = True
+        predicted_codes = predicted_codes[
+            self.codes_in_split(predicted_codes, in_split)
+        ]
+        gold_codes = gold_codes[self.codes_in_split(gold_codes, in_split)]
+        true_positives = sorted_intersection_size(
+            predicted_codes, gold_codes, len(in_split)
+        )
+        return precision_recall_f1(
+            true_positives, len(predicted_codes), len(gold_codes)
+        )
+
+    @staticmethod
+    def codes_in_split(codes: np.ndarray, in_split: np.ndarray) -> np.ndarray:
+        number_rows = np.int64(len(in_split))
+        return in_split[codes // number_rows] & in_split[codes % number_rows]
+
+    @staticmethod
+    def encode_multi_index(multi_index: pd.MultiIndex, ds: Dict) -> np.ndarray:
+        tables = ds.get("tables")
+        first = Evaluator.labels_to_positions(
+            tables[0].index, multi_index.get_level_values(0)
+        )
+        second = Evaluator.labels_to_positions(
+            tables[-1].index, multi_index.get_level_values(1)
+        )
+        return encode_pairs(first, second, len(tables[-1]), len(tables) == 1)
+
+    @staticmethod
+    def labels_to_positions(index: pd.Index, labels: pd.Index) -> np.ndarray:
+        # Tables read from csv have a default RangeIndex, where labels already are positions
+        if isinstance(index, pd.RangeIndex) and index.start == 0 and index.step == 1:
+            return labels.to_numpy()
+        return index.get_indexer(labels)
+
+    @staticmethod
+    def encode_gold_standard(ds_id: str, ds: Dict) -> np.ndarray:
+        tables = ds.get("tables")
+        gold_standard = ds.get("gold_standard")
+        if len(tables) == 2 and "ltable.id" in gold_standard.columns:
+            # Labeled data of two tables can contain non-matches as well
+            for label_col in ["gold", "label"]:
+                if label_col in gold_standard.columns:
+                    gold_standard = gold_standard[gold_standard[label_col] == 1]
+                    break
+            first_ids = gold_standard["ltable.id"]
+            second_ids = gold_standard["rtable.id"]
+        else:
+            first_ids = gold_standard.iloc[:, 0]
+            second_ids = gold_standard.iloc[:, 1]
+        first = pd.Index(tables[0]["id"]).get_indexer(first_ids)
+        second = pd.Index(tables[-1]["id"]).get_indexer(second_ids)
+        found = (first >= 0) & (second >= 0)
+        if not found.all():
+            logging.warning(
+                f"{(~found).sum()} gold standard pairs of dataset {ds_id} reference unknown ids"
+            )
+        return np.unique(
+            encode_pairs(first[found], second[found], len(tables[-1]), len(tables) == 1)
+        )
@@ -8,6 +8,7 @@ from recordlinkage.index import Block, SortedNeighbourhood, Full, Random
 from scipy.stats import entropy
 
 import preprocessor
+from memory_utils import compact_multi_index
 
 
 class Indexer:
@@ -20,6 +21,8 @@ class Indexer:
     def index_data(self) -> Dict[str, Dict]:
         for ds_id, ds in self.ds_dict.items():
             multi_index = self.process_dataset(ds_id, ds)
+            if self.configparser.memory_lean:
+                multi_index = compact_multi_index(multi_index)
             self.ds_dict[ds_id]["multi_index"] = multi_index
         return self.ds_dict
 
@@ -29,21 +32,15 @@ class Indexer:
             try:
                 # TODO: make it a function
                 ltable, rtable = ds_dict.get("tables")
-                # Store original indices
-                ltable_original_index = ltable.reset_index().index.copy()
-                rtable_original_index = rtable.reset_index().index.copy()
-                # Set 'id' as index for lookup
-                ltable_id_index = ltable.set_index("id")
-                rtable_id_index = rtable.set_index("id")
-                # Map IDs in candidate_set to original indices
-                ltable_indices = [
-                    ltable_original_index[ltable_id_index.index.get_loc(_id)]
-                    for _id in candidate_set["ltable.id"]
-                ]
-                rtable_indices = [
-                    rtable_original_index[rtable_id_index.index.get_loc(_id)]
-                    for _id in candidate_set["rtable.id"]
-                ]
+                # Map IDs in candidate_set to row positions without copying the tables
+                ltable_indices = pd.Index(ltable["id"]).get_indexer(
+                    candidate_set["ltable.id"]
+                )
+                rtable_indices = pd.Index(rtable["id"]).get_indexer(
+                    candidate_set["rtable.id"]
+                )
+                if (ltable_indices < 0).any() or (rtable_indices < 0).any():
+                    raise KeyError("Unknown ids in candidate set")
                 # Create MultiIndex using these original indices
                 multi_index = pd.MultiIndex.from_arrays(
                     [ltable_indices, rtable_indices]
@@ -58,25 +55,34 @@ class Indexer:
                     f"Please, rename the foreign keys in the candidate set to ltable._id and rtable._id"
                 )
         else:
-            method = (
-                ds_dict.get("pair_method")
-                if ds_dict.get("pair_method")
-                else self.configparser.default_pair_method
-            )
-            number_indexing_keys = (
-                ds_dict.get("number_indexing_keys", None)
-                if ds_dict.get("number_indexing_keys")
-                else self.configparser.default_number_indexing_keys
-            )
+            method = self.get_pair_method(ds_dict)
+            keys = self.get_indexing_keys(ds_dict)
             tables = ds_dict.get("tables")
             df1 = tables[0]
             df2 = tables[1] if len(tables) == 2 else df1
-            keys = self.get_highest_entropy_common_columns(
-                df1, df2.columns, number_indexing_keys
-            )
             multi_index = self.index(df1, df2, keys, method, ds_id, len(tables))
         return multi_index
 
+    def get_pair_method(self, ds_dict: Dict) -> str:
+        return (
+            ds_dict.get("pair_method")
+            if ds_dict.get("pair_method")
+            else self.configparser.default_pair_method
+        )
+
+    def get_indexing_keys(self, ds_dict: Dict) -> List[str]:
+        number_indexing_keys = (
+            ds_dict.get("number_indexing_keys", None)
+            if ds_dict.get("number_indexing_keys")
+            else self.configparser.default_number_indexing_keys
+        )
+        tables = ds_dict.get("tables")
+        df1 = tables[0]
+        df2 = tables[1] if len(tables) == 2 else df1
+        return self.get_highest_entropy_common_columns(
+            df1, df2.columns, number_indexing_keys
+        )
+
     # TODO: maybe for later: in case of two tables assume that they might be dirty by itself,
     #  then indexing and comparing should be performed not only between the two tables but also within each table
     #  Note: the two tables might have different schemas
@@ -108,13 +114,50 @@ class Indexer:
                     method, ValueError(f"Invalid pair method: {method}")
                 )
             )
-            if number_tables == 1:
-                pairs = indexer.index(df1)
-            else:
-                pairs = indexer.index(df1, df2)
+            # Only the key column is handed over, categoricals as codes or plain values
+            key_dfs = [
+                key_column.to_frame()
+                for key_column in Indexer.blocking_keys(
+                    [df1[key_col]]
+                    if number_tables == 1
+                    else [df1[key_col], df2[key_col]]
+                )
+            ]
+            pairs = indexer.index(*key_dfs)
             combined_index = combined_index.union(pairs)
         return combined_index
 
+    @staticmethod
+    def blocking_keys(columns: List[pd.Series]) -> List[pd.Series]:
+        # recordlinkage cannot sort categoricals, codes of shared sorted categories keep the order of the values
+        if all(isinstance(column.dtype, pd.CategoricalDtype) for column in columns):
+            categories = columns[0].cat.categories
+            for column in columns[1:]:
+                categories = categories.union(column.cat.categories)
+            try:
+                categories = categories.sort_values()
+            except TypeError:
+                # Categories of mixed types have no order
+                return [Indexer.blocking_values(column) for column in columns]
+            return [
+                pd.Series(
+                    column.cat.set_categories(categories).cat.codes.to_numpy(),
+                    index=column.index,
+                    name=column.name,
+                ).where(column.notna())
+                for column in columns
+            ]
+        return [Indexer.blocking_values(column) for column in columns]
+
+    @staticmethod
+    def blocking_values(column: pd.Series) -> pd.Series:
+        # Compacted text columns (memory_lean, ingestion) are categorical or arrow strings
+        if isinstance(column.dtype, pd.CategoricalDtype) or (
+            pd.api.types.is_string_dtype(column) and column.dtype != object
+        ):
+            return column.astype(object)
+        return column
+
     def get_highest_entropy_common_columns(
         self, df1: pd.DataFrame, df2_columns: List[str], number_indexing_keys: int
     ) -> List[str]:
@@ -0,0 +1,238 @@
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config_parser import ConfigParser
+from memory_utils import infer_lean_dtypes, is_low_cardinality
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+
+def split_datetime_dtypes(dtypes: Optional[Dict[str, str]]) -> Tuple[Dict, List[str]]:
+    # read_csv does not parse dates through dtype, datetime columns go to parse_dates instead
+    dtypes = dtypes or {}
+    datetime_columns = [
+        col
+        for col, dtype in dtypes.items()
+        if pd.api.types.is_datetime64_any_dtype(pd.api.types.pandas_dtype(dtype))
+    ]
+    return {
+        col: dtype for col, dtype in dtypes.items() if col not in datetime_columns
+    }, datetime_columns
+
+
+class Ingestor:
+    """Reads csv tables in chunks with a sampled, optionally pinned schema and stores them as Parquet.
+
+    The Parquet file is reused as long as it is newer than the csv file and was written with the same
+    schema options, so later runs skip parsing the csv file.
+    """
+
+    def __init__(self, configparser: ConfigParser):
+        self.configparser = configparser
+        ingestion = configparser.ingestion or {}
+        self.engine = ingestion.get("engine", "pyarrow")
+        self.block_size = int(ingestion.get("block_size_mb", 64) * 1024**2)
+        self.sample_rows = ingestion.get("sample_rows", 10000)
+        if self.engine == "pyarrow" and pa is None:
+            logging.warning("pyarrow is not installed, ingesting csv files with pandas")
+            self.engine = "pandas"
+
+    def load(
+        self,
+        filename: str,
+        columns: Optional[List[str]] = None,
+        dtypes: Optional[Dict[str, str]] = None,
+    ) -> pd.DataFrame:
+        if not Path(filename).exists():
+            raise FileNotFoundError(f"{filename} does not exist")
+        sample = pd.read_csv(filename, nrows=self.sample_rows)
+        columns = self.select_columns(sample, columns)
+        dtypes = {col: dtype for col, dtype in (dtypes or {}).items() if col in columns}
+        if self.engine == "pandas":
+            return self.read_csv(filename, sample, columns, dtypes)
+        try:
+            parquet_file = self.ingest(filename, sample, columns, dtypes)
+        except pa.ArrowInvalid as e:
+            # The sample did not represent the whole file, e.g. text in a column of numbers
+            logging.warning(
+                f"Schema inferred for {filename} does not fit the data ({e}), ingesting it with pandas"
+            )
+            return self.read_csv(filename, sample, columns, dtypes)
+        except ValueError as e:
+            # A pinned dtype without an Arrow counterpart
+            logging.warning(f"{e}, ingesting {filename} with pandas")
+            return self.read_csv(filename, sample, columns, dtypes)
+        df = self.read_parquet(parquet_file)
+        # Arrow types of pinned dtypes can convert back to other pandas dtypes, e.g. int64 with nulls to float64
+        for col, dtype in dtypes.items():
+            df[col] = self.restore_dtype(df[col], self.resolve_dtype(dtype))
+        return df
+
+    @staticmethod
+    def resolve_dtype(dtype: str):
+        # str pins mean object columns as in read_csv, not fixed-width numpy strings
+        if dtype in ["object", "str"]:
+            return np.dtype(object)
+        return pd.api.types.pandas_dtype(dtype)
+
+    @staticmethod
+    def restore_dtype(column: pd.Series, dtype) -> pd.Series:
+        if dtype == object:
+            # Never astype(str), it would turn missing values into the strings "None" or "<NA>".
+            # Arrow strings come back as None or <NA> where read_csv has NaN
+            return column.astype(object).where(column.notna(), np.nan)
+        if isinstance(dtype, pd.CategoricalDtype) and dtype.categories is None:
+            # A plain category pin accepts any categories
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                return column
+        elif column.dtype == dtype:
+            return column
+        return column.astype(dtype)
+
+    @staticmethod
+    def select_columns(sample: pd.DataFrame, columns: Optional[List[str]]) -> List[str]:
+        if not columns:
+            return list(sample.columns)
+        missing_columns = [col for col in columns if col not in sample.columns]
+        if missing_columns:
+            raise ValueError(f"Columns {missing_columns} do not exist")
+        # The id column is needed to map gold standards and candidate sets to the records
+        if "id" in sample.columns and "id" not in columns:
+            columns = ["id"] + list(columns)
+        return [col for col in sample.columns if col in columns]
+
+    def infer_schema(
+        self, sample: pd.DataFrame, columns: List[str], dtypes: Dict[str, str]
+    ) -> "pa.Schema":
+        fields = []
+        for col in columns:
+            if col in dtypes:
+                arrow_type = self.to_arrow_type(dtypes[col])
+            elif pd.api.types.is_bool_dtype(sample[col]):
+                arrow_type = pa.bool_()
+            elif pd.api.types.is_integer_dtype(sample[col]):
+                arrow_type = pa.int64()
+            elif pd.api.types.is_float_dtype(sample[col]):
+                arrow_type = (
+                    pa.float32() if self.configparser.memory_lean else pa.float64()
+                )
+            elif self.configparser.memory_lean and is_low_cardinality(sample[col]):
+                arrow_type = pa.dictionary(pa.int32(), pa.string())
+            else:
+                arrow_type = pa.string()
+            fields.append(pa.field(col, arrow_type))
+        return pa.schema(fields)
+
+    @staticmethod
+    def to_arrow_type(dtype: str) -> "pa.DataType":
+        # Same dtype names as read_csv accepts, e.g. category, Int64, string[pyarrow] or datetime64[ns]
+        try:
+            pandas_dtype = Ingestor.resolve_dtype(dtype)
+            if pandas_dtype == object:
+                return pa.string()
+            if isinstance(pandas_dtype, pd.CategoricalDtype):
+                return pa.dictionary(pa.int32(), pa.string())
+            if isinstance(pandas_dtype, pd.StringDtype):
+                return pa.string()
+            if isinstance(pandas_dtype, pd.ArrowDtype):
+                return pandas_dtype.pyarrow_dtype
+            # Nullable extension dtypes like Int64 wrap a numpy dtype
+            return pa.from_numpy_dtype(
+                getattr(pandas_dtype, "numpy_dtype", pandas_dtype)
+            )
+        except (TypeError, NotImplementedError, pa.ArrowNotImplementedError):
+            raise ValueError(f"Unsupported dtype {dtype}")
+
+    def ingest(
+        self,
+        filename: str,
+        sample: pd.DataFrame,
+        columns: List[str],
+        dtypes: Dict[str, str],
+    ) -> Path:
+        schema = self.infer_schema(sample, columns, dtypes)
+        options = json.dumps(
+            {"schema": schema.to_string(), "memory_lean": self.configparser.memory_lean}
+        )
+        parquet_file = Path(filename).with_suffix(".parquet")
+        if self.is_cached(filename, parquet_file, options):
+            logging.info(f"Using ingested table {parquet_file}")
+            return parquet_file
+        start = time.perf_counter()
+        reader = pa_csv.open_csv(
+            filename,
+            read_options=pa_csv.ReadOptions(block_size=self.block_size),
+            convert_options=pa_csv.ConvertOptions(
+                column_types=schema,
+                include_columns=columns,
+                strings_can_be_null=True,
+            ),
+        )
+        number_rows = 0
+        # Write next to the final file first, so an interrupted ingestion leaves no broken cache behind
+        tmp_file = parquet_file.with_suffix(".parquet.tmp")
+        try:
+            with pq.ParquetWriter(
+                tmp_file, reader.schema.with_metadata({"ingestion": options})
+            ) as writer:
+                for batch in reader:
+                    writer.write_batch(batch)
+                    number_rows += batch.num_rows
+        except Exception:
+            tmp_file.unlink(missing_ok=True)
+            raise
+        tmp_file.replace(parquet_file)
+        logging.info(
+            f"Ingested {number_rows} rows of {filename} into {parquet_file} in {time.perf_counter() - start:.2f}s"
+        )
+        return parquet_file
+
+    @staticmethod
+    def is_cached(filename: str, parquet_file: Path, options: str) -> bool:
+        if (
+            not parquet_file.exists()
+            or parquet_file.stat().st_mtime < Path(filename).stat().st_mtime
+        ):
+            return False
+        metadata = pq.read_schema(parquet_file).metadata or {}
+        return metadata.get(b"ingestion") == options.encode("utf-8")
+
+    def read_parquet(self, parquet_file: Path) -> pd.DataFrame:
+        table = pq.read_table(parquet_file)
+        types_mapper = None
+        if self.configparser.memory_lean:
+            types_mapper = {pa.string(): pd.StringDtype("pyarrow")}.get
+        # Release the arrow buffers while converting, so the table is not held twice
+        return table.to_pandas(
+            types_mapper=types_mapper, split_blocks=True, self_destruct=True
+        )
+
+    def read_csv(
+        self,
+        filename: str,
+        sample: pd.DataFrame,
+        columns: List[str],
+        dtypes: Dict[str, str],
+    ) -> pd.DataFrame:
+        # One read_csv call: the parser already works in blocks and merges their categories,
+        # concatenated chunks would peak higher and turn pinned categories into objects
+        if self.configparser.memory_lean:
+            dtypes = {**infer_lean_dtypes(sample[columns]), **dtypes}
+        dtypes, datetime_columns = split_datetime_dtypes(dtypes)
+        return pd.read_csv(
+            filename,
+            usecols=columns,
+            dtype=dtypes or None,
+            parse_dates=datetime_columns or None,
+        )
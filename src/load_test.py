@@ -0,0 +1,153 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Load test client for the match service (python src/main.py --serve)"
+    )
+    parser.add_argument(
+        "--records",
+        required=True,
+        type=str,
+        help="Path to a csv file the query records are sampled from",
+    )
+    parser.add_argument("--dataset", default=None, type=str, help="Dataset id to query")
+    parser.add_argument(
+        "--host", default="127.0.0.1", type=str, help="Host of the match service"
+    )
+    parser.add_argument(
+        "--port", default=8080, type=int, help="Port of the match service"
+    )
+    parser.add_argument(
+        "--unix-socket",
+        default=None,
+        type=str,
+        help="Path of the unix socket the match service listens on",
+    )
+    parser.add_argument(
+        "--requests", default=1000, type=int, help="Total number of requests"
+    )
+    parser.add_argument(
+        "--concurrency", default=16, type=int, help="Number of concurrent clients"
+    )
+    parser.add_argument(
+        "--batch-size", default=1, type=int, help="Number of records per request"
+    )
+    parser.add_argument(
+        "--seed", default=42, type=int, help="Seed for sampling the query records"
+    )
+    return parser.parse_args()
+
+
+def load_records(path: str) -> List[Dict]:
+    df = pd.read_csv(path)
+    # JSON has no NaN, missing values are sent as null
+    df = df.astype(object).where(df.notna(), None)
+    return df.to_dict(orient="records")
+
+
+async def open_connection(
+    args: argparse.Namespace,
+) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    if args.unix_socket:
+        return await asyncio.open_unix_connection(args.unix_socket)
+    return await asyncio.open_connection(args.host, args.port)
+
+
+async def post(
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    host: str,
+    payload: Dict,
+) -> Tuple[int, Dict]:
+    body = json.dumps(payload, default=str).encode("utf-8")
+    writer.write(
+        f"POST /match HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split(b" ", 2)[1])
+    content_length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            content_length = int(value.strip())
+    return status, json.loads(await reader.readexactly(content_length))
+
+
+async def client(
+    args: argparse.Namespace,
+    queries: asyncio.Queue,
+    latencies: List[float],
+    errors: List[str],
+):
+    reader, writer = await open_connection(args)
+    try:
+        while not queries.empty():
+            records = queries.get_nowait()
+            payload = {"records": records}
+            if args.dataset:
+                payload["dataset"] = args.dataset
+            start = time.perf_counter()
+            status, response = await post(reader, writer, args.host, payload)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(response.get("error", str(status)))
+    finally:
+        writer.close()
+
+
+async def run(args: argparse.Namespace) -> Dict:
+    records = load_records(args.records)
+    rng = random.Random(args.seed)
+    queries = asyncio.Queue()
+    for _ in range(args.requests):
+        queries.put_nowait(rng.sample(records, min(args.batch_size, len(records))))
+    latencies = []
+    errors = []
+    start = time.perf_counter()
+    await asyncio.gather(
+        *[client(args, queries, latencies, errors) for _ in range(args.concurrency)]
+    )
+    duration = time.perf_counter() - start
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "concurrency": args.concurrency,
+        "batch_size": args.batch_size,
+        "duration_s": duration,
+        "requests_per_s": len(latencies) / duration,
+        "records_per_s": len(latencies) * args.batch_size / duration,
+        "mean_ms": float(latencies_ms.mean()),
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p90_ms": float(np.percentile(latencies_ms, 90)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+        "max_ms": float(latencies_ms.max()),
+    }
+
+
+def main():
+    args = parse_args()
+    summary = asyncio.run(run(args))
+    for name, value in summary.items():
+        print(
+            f"{name:>15}: {value:.2f}"
+            if isinstance(value, float)
+            else f"{name:>15}: {value}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import argparse
+import asyncio
 import logging
 import os
 from pathlib import Path
@@ -9,6 +10,10 @@ from preprocessor import Preprocessor
 from indexer import Indexer
 from comparer import Comparer
 from classifier import Classifier
+from evaluator import Evaluator
+from memory_utils import PeakMemoryMonitor, log_memory_usage
+from match_service import MatchService
+from sweep import SweepRunner
 
 
 def setup_logging():
@@ -32,23 +37,98 @@ def parse_args():
         type=str,
         help="Path to configuration file",
     )
+    parser.add_argument(
+        "--sweep",
+        action="store_true",
+        help="Run the configuration grid from global_settings.sweep and print a leaderboard",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Run a long-running match service instead of the batch pipeline",
+    )
+    parser.add_argument(
+        "--host", default="127.0.0.1", type=str, help="Host of the match service"
+    )
+    parser.add_argument(
+        "--port", default=8080, type=int, help="Port of the match service"
+    )
+    parser.add_argument(
+        "--unix-socket",
+        default=None,
+        type=str,
+        help="Path of a unix socket to serve on instead of host and port",
+    )
+    parser.add_argument(
+        "--model",
+        default="svm_record_linkage_model.pkl",
+        type=str,
+        help="Path of the trained classifiers used by the match service, prefixed with the dataset id per dataset",
+    )
+    parser.add_argument(
+        "--max-batch-size",
+        default=64,
+        type=int,
+        help="Maximum number of records the match service scores in one batch",
+    )
+    parser.add_argument(
+        "--max-batch-wait-ms",
+        default=5.0,
+        type=float,
+        help="Time the match service waits for concurrent requests to fill a batch",
+    )
     return parser.parse_args()
 
 
+def serve(cp: ConfigParser, args: argparse.Namespace):
+    service = MatchService(cp, args.model, args.max_batch_size, args.max_batch_wait_ms)
+    service.load()
+    asyncio.run(service.serve(args.host, args.port, args.unix_socket))
+
+
+def sweep(cp: ConfigParser):
+    if not cp.sweep:
+        logging.error("No sweep grid set in global_settings")
+        raise ValueError("A sweep needs a grid in global_settings.sweep")
+    dl = DataLoader(cp)
+    ds_dict = dl.load_data()
+    sr = SweepRunner(cp, ds_dict)
+    leaderboard = sr.run()
+    print(leaderboard.to_string(index=False))
+
+
 def main():
     setup_logging()
     args = parse_args()
     cp = ConfigParser(args.config)
-    dl = DataLoader(cp)
-    ds_dict = dl.load_data()
-    pp = Preprocessor(cp, ds_dict)
-    cleaned_ds_dict = pp.clean_data()
-    ix = Indexer(cp, cleaned_ds_dict)
-    ds_dict_w_mis = ix.index_data()
-    c = Comparer(cp, ds_dict_w_mis)
-    ds_dict_w_matches = c.compare()
-    cl = Classifier(cp, ds_dict_w_matches)
-    cl.split()
+    if args.serve:
+        serve(cp, args)
+        return
+    if args.sweep:
+        sweep(cp)
+        return
+    with PeakMemoryMonitor() as monitor:
+        dl = DataLoader(cp)
+        ds_dict = dl.load_data()
+    log_memory_usage("loading", ds_dict, monitor)
+    with PeakMemoryMonitor() as monitor:
+        pp = Preprocessor(cp, ds_dict)
+        cleaned_ds_dict = pp.clean_data()
+    log_memory_usage("cleaning", cleaned_ds_dict, monitor)
+    with PeakMemoryMonitor() as monitor:
+        ix = Indexer(cp, cleaned_ds_dict)
+        ds_dict_w_mis = ix.index_data()
+    log_memory_usage("indexing", ds_dict_w_mis, monitor)
+    with PeakMemoryMonitor() as monitor:
+        c = Comparer(cp, ds_dict_w_mis)
+        ds_dict_w_matches = c.compare()
+    log_memory_usage("comparing", ds_dict_w_matches, monitor)
+    with PeakMemoryMonitor() as monitor:
+        cl = Classifier(cp, ds_dict_w_matches)
+        ds_dict_w_classifiers = cl.split()
+    log_memory_usage("classification", ds_dict_w_classifiers, monitor)
+    ev = Evaluator(cp, ds_dict_w_classifiers)
+    ev.evaluate()
     # TODO: clean up in the end
     # TODO: unify data format for goldstandard?
     # TODO: document dictionary format & how it transforms
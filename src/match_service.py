@@ -0,0 +1,441 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Tuple, Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from config_parser import ConfigParser
+from data_loader import DataLoader
+from preprocessor import Preprocessor
+from indexer import Indexer
+from comparer import Comparer
+from classifier import Classifier
+
+HTTP_STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    500: "Internal Server Error",
+}
+
+
+class BlockingIndex:
+    """In-memory counterpart of the Indexer pair methods that can be probed with single records."""
+
+    def __init__(self, df: pd.DataFrame, keys: List[str], method: str, window: int = 3):
+        if method not in ["block", "sortedneighbourhood", "full", "random"]:
+            raise ValueError(f"Invalid pair method: {method}")
+        self.method = method
+        self.keys = keys
+        self.number_rows = len(df)
+        self.half_window = window // 2
+        self.sorted_values = {}
+        self.value_positions = {}
+        if method in ["block", "sortedneighbourhood"]:
+            for key_col in keys:
+                # Group row positions by key value, sorted by value as in SortedNeighbourhood
+                # Plain values, categories are not necessarily in the order of their values
+                key_values = Indexer.blocking_values(df[key_col]).to_numpy()
+                groups = pd.Series(np.arange(len(df)), index=key_values)
+                groups = groups[groups.index.notna()].groupby(level=0, sort=True)
+                values = []
+                value_positions = []
+                for value, positions in groups:
+                    values.append(value)
+                    value_positions.append(positions.to_numpy())
+                self.sorted_values[key_col] = np.asarray(values)
+                self.value_positions[key_col] = value_positions
+
+    def probe(self, record: pd.Series) -> np.ndarray:
+        # Random pairs cannot be reproduced for a new record, so like full indexing it compares all rows
+        if self.method in ["full", "random"]:
+            return np.arange(self.number_rows)
+        candidates = [np.empty(0, dtype=np.int64)]
+        for key_col in self.keys:
+            value = record.get(key_col)
+            if value is None or pd.isna(value):
+                continue
+            values = self.sorted_values[key_col]
+            try:
+                rank = int(np.searchsorted(values, value))
+            except TypeError:
+                # Value type cannot be ordered against the table values
+                continue
+            is_known_value = rank < len(values) and values[rank] == value
+            if self.method == "block":
+                if is_known_value:
+                    candidates.append(self.value_positions[key_col][rank])
+                continue
+            # A new value takes a rank of its own, its neighbours are the values around the insertion point
+            first_rank = max(rank - self.half_window, 0)
+            last_rank = rank + self.half_window + (1 if is_known_value else 0)
+            candidates.extend(self.value_positions[key_col][first_rank:last_rank])
+        return np.unique(np.concatenate(candidates))
+
+
+class DatasetState:
+    """Cleaned tables, blocking indexes and comparison setup of a dataset kept in memory by the service."""
+
+    def __init__(
+        self,
+        ds_id: str,
+        tables: List[pd.DataFrame],
+        cleaned_columns: List[List[str]],
+        phonetic_method: Optional[str],
+        indexes: List[BlockingIndex],
+        compare_obj,
+        classifier=None,
+    ):
+        self.ds_id = ds_id
+        self.tables = tables
+        self.cleaned_columns = cleaned_columns
+        self.phonetic_method = phonetic_method
+        self.indexes = indexes
+        self.compare_obj = compare_obj
+        self.classifier = classifier
+
+
+class MatchService:
+    def __init__(
+        self,
+        configparser: ConfigParser,
+        model_path: str = "svm_record_linkage_model.pkl",
+        max_batch_size: int = 64,
+        max_batch_wait_ms: float = 5.0,
+    ):
+        self.configparser = configparser
+        self.model_path = model_path
+        self.max_batch_size = max_batch_size
+        self.max_batch_wait = max_batch_wait_ms / 1000
+        self.datasets = {}
+        self.queue = None
+
+    def load(self) -> Dict[str, DatasetState]:
+        start = time.perf_counter()
+        dl = DataLoader(self.configparser)
+        ds_dict = dl.load_data()
+        pp = Preprocessor(self.configparser, ds_dict)
+        cleaned_ds_dict = pp.clean_data()
+        ix = Indexer(self.configparser, cleaned_ds_dict)
+        for ds_id, ds in cleaned_ds_dict.items():
+            self.datasets[ds_id] = self.build_dataset_state(
+                ds_id, ds, ix, self.load_classifier(ds_id)
+            )
+        logging.info(
+            f"Match service loaded {len(self.datasets)} datasets in {time.perf_counter() - start:.2f}s"
+        )
+        return self.datasets
+
+    def load_classifier(self, ds_id: str):
+        # The pipeline saves a model per dataset, a model of another dataset would score other features
+        model_path = Classifier.get_model_path(self.model_path, ds_id)
+        if model_path is not None and model_path.exists():
+            logging.info(f"Loading classifier of dataset {ds_id} from {model_path}")
+            return joblib.load(model_path)
+        logging.info(
+            f"No classifier for dataset {ds_id} found at {model_path}, scoring with the summed features threshold"
+        )
+        return None
+
+    def build_dataset_state(
+        self, ds_id: str, ds: Dict, ix: Indexer, classifier
+    ) -> DatasetState:
+        if ds.get("candidate_set") is not None:
+            logging.info(
+                f"Dataset {ds_id} uses a fixed candidate set, "
+                f"new records are blocked with the pair method {ix.get_pair_method(ds)} instead"
+            )
+        method = ix.get_pair_method(ds)
+        keys = ix.get_indexing_keys(ds)
+        logging.info(
+            f"Building blocking index for dataset {ds_id} with method {method} and keys {keys}"
+        )
+        tables = ds.get("tables")
+        string_measure = Comparer.set_similarity_measure(
+            self.configparser.default_similarity_string_measure,
+            ds.get("similarity_measures"),
+            "string",
+        )
+        numeric_measure = Comparer.set_similarity_measure(
+            self.configparser.default_similarity_numeric_measure,
+            ds.get("similarity_measures"),
+            "numeric",
+        )
+        # Same feature columns as in the Comparer, so that the trained classifier can score them
+        columns = tables[0].columns
+        if len(tables) == 2:
+            columns = columns.intersection(tables[1].columns)
+        compare_obj = Comparer.create_compare_obj(
+            tables[0], columns, string_measure, numeric_measure
+        )
+        return DatasetState(
+            ds_id,
+            tables,
+            ds.get("cleaned_columns"),
+            ds.get("applied_phonetic_method"),
+            [BlockingIndex(df, keys, method) for df in tables],
+            compare_obj,
+            classifier,
+        )
+
+    def prepare_records(
+        self, state: DatasetState, records: List[Dict], table_number: int
+    ) -> pd.DataFrame:
+        table = state.tables[table_number]
+        record_df = pd.DataFrame.from_records(records).reindex(columns=table.columns)
+        for col in table.columns:
+            dtype = table[col].dtype
+            if isinstance(dtype, pd.CategoricalDtype):
+                # Values unknown to the table categories would become missing
+                dtype = dtype.categories.dtype
+            try:
+                record_df[col] = record_df[col].astype(dtype)
+            except (TypeError, ValueError):
+                # E.g. missing values in an integer column
+                if pd.api.types.is_numeric_dtype(table[col]):
+                    record_df[col] = pd.to_numeric(record_df[col], errors="coerce")
+        # Columns missing in all incoming records have nothing to clean
+        cleaned_columns = [
+            col
+            for col in state.cleaned_columns[table_number]
+            if record_df[col].notna().any()
+        ]
+        record_df, _ = Preprocessor.clean_df(
+            record_df, state.phonetic_method, cleaned_columns
+        )
+        return record_df
+
+    def match_records(
+        self, ds_id: str, records: List[Dict], limit: int = 10
+    ) -> List[List[Dict]]:
+        state = self.datasets.get(ds_id)
+        if state is None:
+            raise KeyError(f"Unknown dataset {ds_id}")
+        results = [[] for _ in records]
+        for table_number, table in enumerate(state.tables):
+            record_df = self.prepare_records(state, records, table_number)
+            index = state.indexes[table_number]
+            record_positions = []
+            table_positions = []
+            for record_position, (_, record) in enumerate(record_df.iterrows()):
+                candidates = index.probe(record)
+                record_positions.append(np.full(len(candidates), record_position))
+                table_positions.append(candidates)
+            record_positions = np.concatenate(record_positions).astype(np.int64)
+            table_positions = np.concatenate(table_positions).astype(np.int64)
+            if len(table_positions) == 0:
+                continue
+            pairs = pd.MultiIndex.from_arrays(
+                [record_df.index[record_positions], table.index[table_positions]]
+            )
+            features = state.compare_obj.compute(pairs, record_df, table)
+            features = features.fillna(0)
+            scores = features.mean(axis=1).to_numpy()
+            is_match = self.predict_matches(state, features)
+            ids = (
+                table["id"].to_numpy()[table_positions]
+                if "id" in table.columns
+                else table_positions
+            )
+            for record_position, table_position, _id, score, match in zip(
+                record_positions, table_positions, ids, scores, is_match
+            ):
+                results[record_position].append(
+                    {
+                        "table": table_number,
+                        "row": int(table_position),
+                        "id": _id.item() if isinstance(_id, np.generic) else _id,
+                        "score": float(score),
+                        "match": bool(match),
+                    }
+                )
+        return [
+            sorted(candidates, key=lambda c: (c["match"], c["score"]), reverse=True)[
+                :limit
+            ]
+            for candidates in results
+        ]
+
+    @staticmethod
+    def predict_matches(state: DatasetState, features: pd.DataFrame) -> np.ndarray:
+        if state.classifier is not None:
+            try:
+                matches = state.classifier.predict(features)
+                return features.index.isin(matches)
+            except Exception as e:
+                logging.error(f"Error scoring candidates of {state.ds_id}: {e}")
+        # Same threshold as in the Comparer: at least half of the features have to agree
+        threshold = int(len(features.columns) * 0.5)
+        return (features.sum(axis=1) > threshold).to_numpy()
+
+    async def submit(self, ds_id: str, records: List[Dict], limit: int) -> List:
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((ds_id, records, limit, future))
+        return await future
+
+    async def batch_worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            number_records = len(batch[0][1])
+            deadline = loop.time() + self.max_batch_wait
+            # Collect concurrent requests until the batch is full or the waiting time is over
+            while number_records < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                number_records += len(item[1])
+            await self.run_batch(batch)
+
+    async def run_batch(self, batch: List[Tuple]):
+        loop = asyncio.get_running_loop()
+        groups = {}
+        for item in batch:
+            groups.setdefault((item[0], item[2]), []).append(item)
+        for (ds_id, limit), items in groups.items():
+            records = [record for item in items for record in item[1]]
+            try:
+                results = await loop.run_in_executor(
+                    None, self.match_records, ds_id, records, limit
+                )
+            except Exception as e:
+                for item in items:
+                    if not item[3].done():
+                        item[3].set_exception(e)
+                continue
+            start = 0
+            for item in items:
+                end = start + len(item[1])
+                if not item[3].done():
+                    item[3].set_result(results[start:end])
+                start = end
+
+    async def handle_request(
+        self, method: str, path: str, body: bytes
+    ) -> Tuple[int, Dict]:
+        if path == "/health":
+            return 200, {"status": "ok", "datasets": list(self.datasets)}
+        if path != "/match":
+            return 404, {"error": f"Unknown path {path}"}
+        if method != "POST":
+            return 405, {"error": "Use POST for /match"}
+        try:
+            payload = json.loads(body or b"{}")
+        except json.JSONDecodeError as e:
+            return 400, {"error": f"Invalid JSON: {e}"}
+        if not isinstance(payload, dict):
+            return 400, {"error": "Expected a JSON object"}
+        ds_id = payload.get("dataset", next(iter(self.datasets), None))
+        if ds_id not in self.datasets:
+            return 404, {"error": f"Unknown dataset {ds_id}"}
+        if "record" in payload:
+            records = [payload["record"]]
+        else:
+            records = payload.get("records")
+        if not isinstance(records, list) or not all(
+            isinstance(record, dict) for record in records
+        ):
+            return 400, {"error": "Expected a 'record' object or a 'records' array"}
+        limit = payload.get("limit", 10)
+        # bool is a subclass of int, but no valid limit
+        if not isinstance(limit, int) or isinstance(limit, bool) or limit < 1:
+            return 400, {"error": "Expected a positive integer 'limit'"}
+        if not records:
+            return 200, {"dataset": ds_id, "results": []}
+        results = await self.submit(ds_id, records, limit)
+        return 200, {"dataset": ds_id, "results": results}
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                except ValueError:
+                    await self.write_response(
+                        writer, 400, {"error": "Bad request line"}, False
+                    )
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    content_length = int(headers.get("content-length", 0))
+                    if content_length < 0:
+                        raise ValueError
+                except ValueError:
+                    # Without a valid length the body cannot be told apart from the next request
+                    await self.write_response(
+                        writer, 400, {"error": "Invalid Content-Length"}, False
+                    )
+                    break
+                body = await reader.readexactly(content_length)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                try:
+                    status, response = await self.handle_request(
+                        method.upper(), path.split("?")[0], body
+                    )
+                except Exception as e:
+                    logging.error(f"Error handling {method} {path}: {e}")
+                    status, response = 500, {"error": str(e)}
+                await self.write_response(writer, status, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def write_response(
+        writer: asyncio.StreamWriter, status: int, response: Dict, keep_alive: bool
+    ):
+        body = json.dumps(response).encode("utf-8")
+        header = (
+            f"HTTP/1.1 {status} {HTTP_STATUS_TEXT[status]}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(header.encode("latin-1") + body)
+        await writer.drain()
+
+    async def serve(
+        self, host: str = "127.0.0.1", port: int = 8080, unix_socket: str = None
+    ):
+        self.queue = asyncio.Queue()
+        worker = asyncio.create_task(self.batch_worker())
+        if unix_socket:
+            if os.path.exists(unix_socket):
+                os.remove(unix_socket)
+            server = await asyncio.start_unix_server(
+                self.handle_connection, path=unix_socket
+            )
+            logging.info(f"Match service listening on unix socket {unix_socket}")
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port)
+            logging.info(f"Match service listening on http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            worker.cancel()
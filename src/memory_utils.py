@@ -0,0 +1,150 @@
+import logging
+import resource
+import sys
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss / 1024**2 if sys.platform == "darwin" else peak_rss / 1024
+
+
+def frame_memory_mb(*frames) -> float:
+    size = 0
+    for frame in frames:
+        if isinstance(frame, (pd.DataFrame, pd.Series)):
+            size += frame.memory_usage(index=True, deep=True).sum()
+        elif isinstance(frame, pd.Index):
+            size += frame.memory_usage(deep=True)
+    return size / 1024**2
+
+
+def dataset_memory_mb(ds: Dict) -> float:
+    frames = list(ds.get("tables", []))
+    for key in ["gold_standard", "candidate_set", "multi_index", "similarity_scores"]:
+        if ds.get(key) is not None:
+            frames.append(ds.get(key))
+    return frame_memory_mb(*frames)
+
+
+def log_memory_usage(
+    stage: str, ds_dict: Dict[str, Dict], monitor: Optional["PeakMemoryMonitor"] = None
+):
+    for ds_id, ds in ds_dict.items():
+        logging.info(
+            f"Memory after {stage} of dataset {ds_id}: {dataset_memory_mb(ds):.1f} MB in tables and features"
+        )
+    if monitor is not None:
+        # ru_maxrss only grows over the whole run, the monitor gives the peak of this stage
+        logging.info(
+            f"RSS during {stage}: {monitor.start_mb:.1f} MB before, {monitor.peak_mb:.1f} MB at the peak"
+        )
+    logging.info(f"Peak RSS of the process after {stage}: {peak_rss_mb():.1f} MB")
+
+
+def string_dtype():
+    # Arrow-backed strings need the optional pyarrow package, object strings are kept otherwise
+    try:
+        import pyarrow  # noqa: F401
+
+        return "string[pyarrow]"
+    except ImportError:
+        return object
+
+
+def is_low_cardinality(column: pd.Series) -> bool:
+    non_null_column = column.dropna()
+    return (
+        len(non_null_column) > 0
+        and non_null_column.nunique() / len(non_null_column)
+        <= CATEGORY_MAX_UNIQUE_RATIO
+    )
+
+
+def infer_lean_dtypes(sample: pd.DataFrame) -> Dict[str, str]:
+    # Text columns with few distinct values are parsed as categoricals, their strings are never held as objects
+    return {
+        col: "category"
+        for col in sample.columns
+        if sample[col].dtype == object and is_low_cardinality(sample[col])
+    }
+
+
+def compact_df(df: pd.DataFrame) -> pd.DataFrame:
+    for col in df.columns:
+        column = df[col]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            continue
+        if pd.api.types.is_string_dtype(column) or column.dtype == object:
+            if is_low_cardinality(column):
+                df[col] = column.astype("category")
+            elif pd.api.types.infer_dtype(column, skipna=True) == "string":
+                df[col] = column.astype(string_dtype())
+        elif pd.api.types.is_bool_dtype(column):
+            continue
+        elif pd.api.types.is_integer_dtype(column):
+            df[col] = pd.to_numeric(column, downcast="integer")
+        elif pd.api.types.is_float_dtype(column):
+            df[col] = pd.to_numeric(column, downcast="float")
+    return df
+
+
+def compact_features(features: pd.DataFrame) -> pd.DataFrame:
+    # Similarity scores lie between 0 and 1, float32 is precise enough
+    return features.astype(np.float32)
+
+
+def compact_multi_index(multi_index: pd.MultiIndex) -> pd.MultiIndex:
+    # Levels hold the row positions of the pairs, the codes are already downcast by pandas
+    levels = [
+        level.astype(np.int32)
+        if pd.api.types.is_integer_dtype(level)
+        and (len(level) == 0 or level.max() < np.iinfo(np.int32).max)
+        else level
+        for level in multi_index.levels
+    ]
+    return multi_index.set_levels(levels, verify_integrity=False)
+
+
+def current_rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as file:
+            resident_pages = int(file.read().split()[1])
+        return resident_pages * resource.getpagesize() / 1024**2
+    except OSError:
+        # No procfs, e.g. on macOS: the peak is the closest available figure
+        return peak_rss_mb()
+
+
+class PeakMemoryMonitor:
+    """Samples the RSS of the process in a background thread to find the peak within a block of code."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak_mb = 0.0
+        self.start_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak_mb = max(self.peak_mb, current_rss_mb())
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> "PeakMemoryMonitor":
+        self.start_mb = self.peak_mb = current_rss_mb()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, current_rss_mb())
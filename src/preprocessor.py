@@ -1,11 +1,13 @@
 import logging
-from typing import Tuple, Dict
+from typing import Tuple, Dict, List, Optional
 
+import numpy as np
 import pandas as pd
 from pandas.api.types import is_string_dtype, is_datetime64_any_dtype
 from recordlinkage.preprocessing import clean, phonetic
 
 from config_parser import ConfigParser
+from memory_utils import compact_df
 
 
 def is_column_id(column: pd.Series) -> bool:
@@ -28,6 +30,15 @@ def is_column_id(column: pd.Series) -> bool:
         return False
 
 
+def is_text_column(column: pd.Series) -> bool:
+    # Same answer for object, arrow string and categorical columns, with or without missing values
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return is_text_column(pd.Series(column.cat.categories))
+    if column.dtype == object:
+        return pd.api.types.infer_dtype(column, skipna=True) == "string"
+    return is_string_dtype(column)
+
+
 class Preprocessor:
     def __init__(self, configparser: ConfigParser, ds_dict: Dict[str, Dict]):
         self.ds_dict = ds_dict
@@ -40,9 +51,14 @@ class Preprocessor:
             phonetic_method = self.configparser.default_phonetic_method
             if ds.get("phonetic_method") is not None:
                 phonetic_method = ds.get("phonetic_method")
+            cleaned_columns = []
             for table_name, df in zip(ds.get("table_names"), ds.get("tables")):
-                df, changes_log = self.clean_df(df, phonetic_method)
+                columns = self.get_cleanable_columns(df)
+                df, changes_log = self.clean_df(df, phonetic_method, columns)
+                if self.configparser.memory_lean:
+                    df = compact_df(df)
                 cleaned_dfs.append(df)
+                cleaned_columns.append(columns)
                 if table_name.startswith("http"):
                     table_name = f'{ds_id}_{table_name.split("/")[-1]}'
                 cleaned_file = self.configparser.data_dir / f"cleaned_{table_name}"
@@ -52,28 +68,72 @@ class Preprocessor:
                 )
                 logging.info(f"Cleaned table saved to {cleaned_file}")
             self.ds_dict[ds_id]["cleaned_tables"] = cleaned_dfs
+            # Keep the per-table cleaning decisions so single records can be cleaned the same way later
+            self.ds_dict[ds_id]["cleaned_columns"] = cleaned_columns
+            self.ds_dict[ds_id]["applied_phonetic_method"] = phonetic_method
         return self.ds_dict
 
     @staticmethod
-    def clean_df(df: pd.DataFrame, phonetic_method: str) -> Tuple[pd.DataFrame, Dict]:
+    def get_cleanable_columns(df: pd.DataFrame) -> List[str]:
+        cleanable_columns = []
+        for col in df.columns:
+            try:
+                if is_text_column(df[col]) and not is_column_id(df[col]):
+                    cleanable_columns.append(col)
+            except Exception as e:
+                logging.error(f"Error inspecting column {col}: {str(e)}")
+        return cleanable_columns
+
+    @staticmethod
+    def clean_column(column: pd.Series, phonetic_method: str) -> pd.Series:
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            # Clean every distinct value once, cleaned values can collapse into fewer categories
+            cleaned_categories = Preprocessor.clean_column(
+                pd.Series(column.cat.categories.astype(object)), phonetic_method
+            )
+            # Sorted categories, so that ordering by code is ordering by value
+            category_codes, categories = pd.factorize(cleaned_categories, sort=True)
+            codes = column.cat.codes.to_numpy()
+            codes = np.where(codes >= 0, category_codes[codes], -1)
+            return pd.Series(
+                pd.Categorical.from_codes(codes, categories=categories),
+                index=column.index,
+                name=column.name,
+            )
+        cleaned_data = clean(
+            column,
+            lowercase=True,
+            replace_by_whitespace="[\\-\\_]",
+            strip_accents="unicode",
+            remove_brackets=True,
+        )
+        if phonetic_method:
+            cleaned_data = phonetic(cleaned_data, method=phonetic_method)
+        return cleaned_data
+
+    @staticmethod
+    def clean_df(
+        df: pd.DataFrame, phonetic_method: str, columns: Optional[List[str]] = None
+    ) -> Tuple[pd.DataFrame, Dict]:
+        # Columns to clean are detected on the table itself unless they are given,
+        # e.g. when a single incoming record has to follow the rules of its table
+        if columns is None:
+            columns = Preprocessor.get_cleanable_columns(df)
         changes_log = {}
-        original_df = df.copy()
         for col in df.columns:
             try:
-                if is_string_dtype(df[col]) and not is_column_id(df[col]):
-                    cleaned_data = clean(
-                        df[col],
-                        lowercase=True,
-                        replace_by_whitespace="[\\-\\_]",
-                        strip_accents="unicode",
-                        remove_brackets=True,
-                    )
-                    if phonetic_method:
-                        cleaned_data = phonetic(cleaned_data, method=phonetic_method)
-                    df[col] = cleaned_data
+                # Columns are replaced, not modified in place, so no copy of the table is needed
+                original_column = df[col]
+                if col in columns:
+                    df[col] = Preprocessor.clean_column(df[col], phonetic_method)
                 elif is_datetime64_any_dtype(df[col]):
                     df[col] = pd.to_datetime(df[col], errors="coerce")
-                changes = original_df[col] != df[col]
+                if isinstance(original_column.dtype, pd.CategoricalDtype) or isinstance(
+                    df[col].dtype, pd.CategoricalDtype
+                ):
+                    changes = original_column.astype(object) != df[col].astype(object)
+                else:
+                    changes = original_column != df[col]
                 changes_log[col] = (
                     changes.sum()
                     if isinstance(changes, pd.Series)
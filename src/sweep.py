@@ -0,0 +1,240 @@
+import concurrent.futures as cf
+import itertools
+import logging
+import time
+from configparser import ConfigParser
+from typing import Dict, List, Tuple, Optional
+
+import pandas as pd
+
+from preprocessor import Preprocessor
+from indexer import Indexer
+from comparer import Comparer
+from classifier import Classifier
+from evaluator import Evaluator
+
+STAGES = ["clean", "index", "compare", "train"]
+
+
+def run_clean(
+    tables: List[pd.DataFrame], phonetic_method: Optional[str]
+) -> Tuple[List[pd.DataFrame], float]:
+    start = time.perf_counter()
+    cleaned_tables = [
+        Preprocessor.clean_df(df.copy(), phonetic_method)[0] for df in tables
+    ]
+    return cleaned_tables, time.perf_counter() - start
+
+
+def run_index(
+    configparser: ConfigParser,
+    ds_id: str,
+    ds: Dict,
+    pair_method: str,
+    number_indexing_keys: int,
+) -> Tuple[pd.MultiIndex, float]:
+    start = time.perf_counter()
+    ds = dict(ds, pair_method=pair_method, number_indexing_keys=number_indexing_keys)
+    multi_index = Indexer(configparser, {ds_id: ds}).process_dataset(ds_id, ds)
+    return multi_index, time.perf_counter() - start
+
+
+def run_compare(
+    configparser: ConfigParser,
+    ds_id: str,
+    ds: Dict,
+    string_measure: str,
+    numeric_measure: str,
+) -> Tuple[pd.DataFrame, float]:
+    start = time.perf_counter()
+    ds = dict(
+        ds, similarity_measures={"string": string_measure, "numeric": numeric_measure}
+    )
+    ds_dict = Comparer(configparser, {ds_id: ds}).compare()
+    return ds_dict[ds_id]["similarity_scores"], time.perf_counter() - start
+
+
+def run_train(
+    configparser: ConfigParser, ds_id: str, ds: Dict, random_state: int
+) -> Tuple[Dict, float]:
+    start = time.perf_counter()
+    ds_dict = Classifier(
+        configparser, {ds_id: dict(ds)}, model_path=None, random_state=random_state
+    ).split()
+    ds_dict = Evaluator(configparser, ds_dict).evaluate()
+    return ds_dict[ds_id]["evaluation"], time.perf_counter() - start
+
+
+class SweepRunner:
+    """Runs a grid of configurations as a DAG of stages, computing every shared stage only once.
+
+    A node is identified by its stage and the grid values it depends on, e.g.
+    ("index", ds_id, phonetic_method, pair_method, number_indexing_keys).
+    """
+
+    def __init__(self, configparser: ConfigParser, ds_dict: Dict[str, Dict]):
+        self.configparser = configparser
+        self.ds_dict = ds_dict
+        self.sweep = configparser.sweep or {}
+        self.max_workers = self.sweep.get("max_workers", None)
+        # Same cluster split for every grid point, so that their scores are comparable
+        self.random_state = self.sweep.get("random_state", 42)
+        self.results = {}
+        self.timings = {}
+        self.failed = set()
+
+    def build_grid(self, ds: Dict) -> List[Tuple]:
+        phonetic_method = (
+            ds.get("phonetic_method")
+            if ds.get("phonetic_method") is not None
+            else self.configparser.default_phonetic_method
+        )
+        number_indexing_keys = (
+            ds.get("number_indexing_keys")
+            if ds.get("number_indexing_keys")
+            else self.configparser.default_number_indexing_keys
+        )
+        similarity_measures = self.sweep.get("similarity_measures", {})
+        # Fields missing in the sweep keep the value of the dataset config
+        return list(
+            itertools.product(
+                self.sweep.get("phonetic_method", [phonetic_method]),
+                self.sweep.get(
+                    "pair_method", [Indexer(self.configparser).get_pair_method(ds)]
+                ),
+                self.sweep.get("number_indexing_keys", [number_indexing_keys]),
+                similarity_measures.get(
+                    "string",
+                    [
+                        Comparer.set_similarity_measure(
+                            self.configparser.default_similarity_string_measure,
+                            ds.get("similarity_measures"),
+                            "string",
+                        )
+                    ],
+                ),
+                similarity_measures.get(
+                    "numeric",
+                    [
+                        Comparer.set_similarity_measure(
+                            self.configparser.default_similarity_numeric_measure,
+                            ds.get("similarity_measures"),
+                            "numeric",
+                        )
+                    ],
+                ),
+            )
+        )
+
+    @staticmethod
+    def get_node_chain(ds_id: str, point: Tuple) -> List[Tuple]:
+        phonetic_method, pair_method, number_indexing_keys, string, numeric = point
+        clean = ("clean", ds_id, phonetic_method)
+        index = ("index",) + clean[1:] + (pair_method, number_indexing_keys)
+        compare = ("compare",) + index[1:] + (string, numeric)
+        train = ("train",) + compare[1:]
+        return [clean, index, compare, train]
+
+    def submit(self, executor: cf.Executor, node: Tuple) -> cf.Future:
+        stage, ds_id = node[:2]
+        # Stages only get what they need, large inputs are pickled for every task
+        ds = {
+            key: value
+            for key, value in self.ds_dict[ds_id].items()
+            if key not in ["tables", "cleaned_tables", "candidate_set"]
+        }
+        if stage == "clean":
+            return executor.submit(run_clean, self.ds_dict[ds_id]["tables"], node[2])
+        ds["tables"] = self.results[("clean",) + node[1:3]]
+        if stage == "index":
+            ds["candidate_set"] = self.ds_dict[ds_id].get("candidate_set")
+            return executor.submit(
+                run_index, self.configparser, ds_id, ds, node[3], node[4]
+            )
+        ds["multi_index"] = self.results[("index",) + node[1:5]]
+        if stage == "compare":
+            return executor.submit(
+                run_compare, self.configparser, ds_id, ds, node[5], node[6]
+            )
+        ds["similarity_scores"] = self.results[("compare",) + node[1:]]
+        return executor.submit(
+            run_train, self.configparser, ds_id, ds, self.random_state
+        )
+
+    def run(self) -> pd.DataFrame:
+        start = time.perf_counter()
+        points = {}
+        children = {}
+        for ds_id, ds in self.ds_dict.items():
+            for point in self.build_grid(ds):
+                chain = self.get_node_chain(ds_id, point)
+                points[(ds_id,) + point] = chain
+                children.setdefault(chain[0], [])
+                for parent, child in zip(chain, chain[1:]):
+                    if child not in children.setdefault(parent, []):
+                        children[parent].append(child)
+                children.setdefault(chain[-1], [])
+        roots = {chain[0] for chain in points.values()}
+        logging.info(
+            f"Sweeping {len(points)} grid points with {len(children)} stages "
+            f"instead of {len(points) * len(STAGES)}"
+        )
+        with cf.ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = {self.submit(executor, node): node for node in roots}
+            while pending:
+                done, _ = cf.wait(pending, return_when=cf.FIRST_COMPLETED)
+                for future in done:
+                    node = pending.pop(future)
+                    try:
+                        self.results[node], self.timings[node] = future.result()
+                    except Exception as e:
+                        logging.error(f"Sweep stage {node} failed: {e}")
+                        self.failed.add(node)
+                        continue
+                    logging.info(
+                        f"Sweep stage {node} finished in {self.timings[node]:.2f}s"
+                    )
+                    for child in children[node]:
+                        pending[self.submit(executor, child)] = child
+                    if node[0] == "compare":
+                        # Similarity scores are the largest intermediate and only needed by the one train stage
+                        del self.results[node]
+        logging.info(f"Sweep finished in {time.perf_counter() - start:.2f}s")
+        leaderboard = self.create_leaderboard(points)
+        leaderboard_file = self.configparser.data_dir / "sweep_leaderboard.csv"
+        leaderboard.to_csv(leaderboard_file, index=False)
+        logging.info(f"Sweep leaderboard saved to {leaderboard_file}")
+        logging.info(f"Sweep leaderboard:\n{leaderboard.to_string(index=False)}")
+        return leaderboard
+
+    def create_leaderboard(self, points: Dict[Tuple, List[Tuple]]) -> pd.DataFrame:
+        rows = []
+        for point, chain in points.items():
+            multi_index = self.results.get(chain[1])
+            evaluation = self.results.get(chain[-1], {})
+            blocking = evaluation.get("blocking", {})
+            rows.append(
+                {
+                    "dataset": point[0],
+                    "phonetic_method": point[1],
+                    "pair_method": point[2],
+                    "number_indexing_keys": point[3],
+                    "string_measure": point[4],
+                    "numeric_measure": point[5],
+                    "pairs": len(multi_index) if multi_index is not None else None,
+                    "pair_completeness": blocking.get("pair_completeness"),
+                    "reduction_ratio": blocking.get("reduction_ratio"),
+                    "pair_quality": blocking.get("pair_quality"),
+                    "val_f1": evaluation.get("val", {}).get("f1"),
+                    "test_f1": evaluation.get("test", {}).get("f1"),
+                    # Runtime of the grid point as if it ran alone, shared stages are counted for every point
+                    "runtime_s": sum(self.timings.get(node, 0.0) for node in chain),
+                    "failed": any(node in self.failed for node in chain)
+                    or chain[-1] not in self.results,
+                }
+            )
+        return pd.DataFrame(rows).sort_values(
+            ["dataset", "val_f1", "pair_completeness", "runtime_s"],
+            ascending=[True, False, False, True],
+            na_position="last",
+        )
@@ -0,0 +1,168 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from evaluator import Evaluator, encode_pairs, sorted_membership
+
+
+class FixedClassifier:
+    # Stands in for the trained classifier, predicts a fixed set of pairs
+    def __init__(self, matches: pd.MultiIndex):
+        self.matches = matches
+
+    def predict(self, similarity_scores: pd.DataFrame) -> pd.MultiIndex:
+        return self.matches
+
+
+def naive_pairs(tables, position_pairs, dedup):
+    # Pairs of ids as a set of tuples, in deduplication (a, b) and (b, a) are the same pair
+    first_ids = tables[0]["id"].to_numpy()
+    second_ids = tables[-1]["id"].to_numpy()
+    pairs = set()
+    for first, second in position_pairs:
+        pair = (first_ids[first], second_ids[second])
+        pairs.add(tuple(sorted(pair)) if dedup else pair)
+    return pairs
+
+
+def naive_gold_pairs(tables, gold_pairs, dedup):
+    known_first = set(tables[0]["id"])
+    known_second = set(tables[-1]["id"])
+    return {
+        tuple(sorted(pair)) if dedup else pair
+        for pair in gold_pairs
+        if pair[0] in known_first and pair[1] in known_second
+    }
+
+
+def naive_scores(predicted, gold):
+    true_positives = len(predicted & gold)
+    precision = true_positives / len(predicted) if predicted else 0.0
+    recall = true_positives / len(gold) if gold else 0.0
+    return true_positives, precision, recall
+
+
+def create_dataset(number_tables: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    number_rows = 60
+    # Ids differ from the row positions, as in real tables
+    tables = [
+        pd.DataFrame({"id": rng.permutation(number_rows) + 1000 * (table + 1)})
+        for table in range(number_tables)
+    ]
+    positions = rng.integers(0, number_rows, (400, 2))
+    positions = positions[positions[:, 0] != positions[:, 1]]
+    # Reversed and repeated candidate pairs
+    candidates = np.concatenate([positions, positions[:40, ::-1], positions[:20]])
+    first_ids = tables[0]["id"].to_numpy()
+    second_ids = tables[-1]["id"].to_numpy()
+    gold_pairs = [
+        (first_ids[first], second_ids[second])
+        for first, second in rng.integers(0, number_rows, (30, 2))
+        if first != second
+    ]
+    # Part of the gold standard is among the candidates, in reversed order as well
+    gold_pairs += [(first_ids[a], second_ids[b]) for a, b in positions[:15]]
+    gold_pairs += [(second_ids[b], first_ids[a]) for a, b in positions[15:20]]
+    # A gold standard pair with an id that is not in the table
+    gold_pairs.append((first_ids[0], 999999))
+    return tables, candidates, gold_pairs
+
+
+@pytest.mark.parametrize("number_tables", [1, 2])
+def test_blocking_metrics_match_naive_pair_sets(number_tables):
+    tables, candidates, gold_pairs = create_dataset(number_tables)
+    dedup = number_tables == 1
+    if dedup:
+        gold_standard = pd.DataFrame(gold_pairs, columns=["p1", "p2"])
+    else:
+        # Labeled pairs of two tables, non-matches have to be ignored
+        first_ids = tables[0]["id"].to_numpy()
+        second_ids = tables[1]["id"].to_numpy()
+        non_matches = [(first_ids[a], second_ids[b]) for a, b in candidates[100:105]]
+        gold_standard = pd.DataFrame(
+            gold_pairs + non_matches, columns=["ltable.id", "rtable.id"]
+        )
+        gold_standard["label"] = [1] * len(gold_pairs) + [0] * len(non_matches)
+    ds = {
+        "tables": tables,
+        "gold_standard": gold_standard,
+        "multi_index": pd.MultiIndex.from_arrays([candidates[:, 0], candidates[:, 1]]),
+    }
+    evaluation = Evaluator(None, {"ds": ds}).evaluate()["ds"]["evaluation"]
+    candidate_pairs = naive_pairs(tables, candidates, dedup)
+    gold = naive_gold_pairs(tables, gold_pairs, dedup)
+    true_positives, pair_quality, pair_completeness = naive_scores(
+        candidate_pairs, gold
+    )
+    assert true_positives > 0
+    blocking = evaluation["blocking"]
+    assert blocking["candidate_pairs"] == len(candidate_pairs)
+    assert blocking["gold_pairs"] == len(gold)
+    assert blocking["pair_completeness"] == pytest.approx(pair_completeness)
+    assert blocking["pair_quality"] == pytest.approx(pair_quality)
+    number_rows = len(tables[0])
+    total_pairs = number_rows * (number_rows - 1) // 2 if dedup else number_rows**2
+    assert blocking["reduction_ratio"] == pytest.approx(
+        1 - len(candidate_pairs) / total_pairs
+    )
+
+
+def test_split_metrics_match_naive_pair_sets():
+    tables, candidates, gold_pairs = create_dataset(1, seed=1)
+    ids = tables[0]["id"].to_numpy()
+    split_ids = {"val_ids": set(ids[:20]), "test_ids": set(ids[20:45])}
+    # Predictions with reversed and repeated pairs
+    ds = {
+        "tables": tables,
+        "gold_standard": pd.DataFrame(gold_pairs, columns=["p1", "p2"]),
+        "multi_index": pd.MultiIndex.from_arrays([candidates[:, 0], candidates[:, 1]]),
+        "classifier": FixedClassifier(
+            pd.MultiIndex.from_arrays([candidates[:, 0], candidates[:, 1]])
+        ),
+        "similarity_scores": None,
+        **split_ids,
+    }
+    evaluation = Evaluator(None, {"ds": ds}).evaluate()["ds"]["evaluation"]
+    predicted = naive_pairs(tables, candidates, True)
+    gold = naive_gold_pairs(tables, gold_pairs, True)
+    for split in ["val", "test"]:
+        in_split = split_ids[f"{split}_ids"]
+        _, precision, recall = naive_scores(
+            {pair for pair in predicted if set(pair) <= in_split},
+            {pair for pair in gold if set(pair) <= in_split},
+        )
+        assert evaluation[split]["precision"] == pytest.approx(precision)
+        assert evaluation[split]["recall"] == pytest.approx(recall)
+
+
+def test_sorted_membership_matches_isin():
+    rng = np.random.default_rng(2)
+    number_rows = 50
+    # The last row with pairs is far from the others, so that no neighbouring row covers it
+    sorted_codes = np.unique(
+        encode_pairs(
+            np.append(rng.integers(0, 30, 80), 40),
+            np.append(rng.integers(0, 30, 80), 45),
+            number_rows,
+            True,
+        )
+    )
+    # Codes of rows beyond the last and on the last row of the set, and of rows without pairs
+    codes = np.concatenate(
+        [
+            encode_pairs(
+                rng.integers(0, number_rows, 500),
+                rng.integers(0, number_rows, 500),
+                number_rows,
+                False,
+            ),
+            sorted_codes[-3:],
+            sorted_codes[:3],
+        ]
+    )
+    np.testing.assert_array_equal(
+        sorted_membership(codes, sorted_codes, number_rows),
+        np.isin(codes, sorted_codes),
+    )
+    assert not sorted_membership(codes, sorted_codes[:0], number_rows).any()
@@ -0,0 +1,59 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from indexer import Indexer
+from memory_utils import compact_df
+
+
+def create_table(number_rows: int = 300) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    names = np.array(["anna", "ben", "clara", "david", "emma", "felix"], dtype=object)
+    cities = np.array(["kiel", "essen"], dtype=object)
+    return pd.DataFrame(
+        {
+            "id": np.arange(number_rows),
+            "name": names[rng.integers(0, len(names), number_rows)],
+            "city": cities[rng.integers(0, len(cities), number_rows)],
+        }
+    )
+
+
+def index_table(df: pd.DataFrame, method: str, memory_lean: bool) -> pd.MultiIndex:
+    configparser = SimpleNamespace(
+        memory_lean=memory_lean,
+        default_pair_method=method,
+        default_number_indexing_keys=1,
+    )
+    ds_dict = {"ds": {"tables": [df]}}
+    return Indexer(configparser, ds_dict).index_data()["ds"]["multi_index"]
+
+
+@pytest.mark.parametrize("method", ["block", "sortedneighbourhood"])
+def test_lean_mode_indexes_categorical_key(method):
+    df = create_table()
+    lean_df = compact_df(df.copy())
+    assert isinstance(lean_df["name"].dtype, pd.CategoricalDtype)
+    multi_index = index_table(df, method, memory_lean=False)
+    lean_multi_index = index_table(lean_df, method, memory_lean=True)
+    assert len(lean_multi_index) > 0
+    assert lean_multi_index.sort_values().equals(multi_index.sort_values())
+
+
+@pytest.mark.parametrize("method", ["block", "sortedneighbourhood"])
+def test_categorical_keys_of_two_tables_share_codes(method):
+    df1 = create_table()
+    df2 = create_table().iloc[::-1].reset_index(drop=True)
+    df2.loc[:50, "name"] = "zoe"
+    multi_index = Indexer.index(df1, df2, ["name"], method, "ds", 2)
+    # Categories that differ between the tables and are not sorted
+    lean_df1 = df1.assign(
+        name=pd.Categorical(df1["name"]).reorder_categories(
+            sorted(df1["name"].unique(), reverse=True)
+        )
+    )
+    lean_df2 = df2.assign(name=df2["name"].astype("category"))
+    lean_multi_index = Indexer.index(lean_df1, lean_df2, ["name"], method, "ds", 2)
+    assert lean_multi_index.sort_values().equals(multi_index.sort_values())
@@ -0,0 +1,42 @@
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from data_loader import DataLoader
+from ingestion import Ingestor
+
+DTYPES = {
+    "city": "category",
+    "number": "Int64",
+    "date": "datetime64[ns]",
+    "name": "string[pyarrow]",
+    "zip": "str",
+}
+
+
+@pytest.mark.parametrize("engine", ["pandas", "pyarrow"])
+@pytest.mark.parametrize("memory_lean", [False, True])
+def test_pinned_dtypes_match_the_csv_reader(tmp_path, engine, memory_lean):
+    filename = tmp_path / "table.csv"
+    pd.DataFrame(
+        {
+            "id": range(6),
+            "city": ["kiel", "essen", "kiel", None, "bonn", "kiel"],
+            "number": pd.array([1, None, 3, 4, 5, 6], dtype="Int64"),
+            "date": ["2020-01-01"] * 6,
+            "name": list("abcdef"),
+            "zip": ["01067", None, "24103", "01067", None, "53111"],
+        }
+    ).to_csv(filename, index=False)
+    configparser = SimpleNamespace(
+        ingestion={"engine": engine}, memory_lean=memory_lean
+    )
+    df = Ingestor(configparser).load(filename, None, DTYPES)
+    expected = DataLoader.load_dataset(filename, None, DTYPES)
+    # The pyarrow engine must not have fallen back to pandas
+    assert (tmp_path / "table.parquet").exists() == (engine == "pyarrow")
+    assert isinstance(df["city"].dtype, pd.CategoricalDtype)
+    # Missing values of str pins stay missing instead of becoming the string "None"
+    assert df["zip"].isna().sum() == 2
+    pd.testing.assert_frame_equal(df, expected, check_categorical=False)
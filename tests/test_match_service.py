@@ -0,0 +1,77 @@
+import asyncio
+
+import joblib
+import pandas as pd
+import pytest
+
+from classifier import Classifier
+from match_service import BlockingIndex, MatchService
+
+
+@pytest.mark.parametrize(
+    "method, value, expected",
+    [
+        ("block", "zurich", [0]),
+        ("block", "aachen", [2]),
+        ("block", "bremen", []),
+        ("sortedneighbourhood", "koln", [0, 1, 3]),
+        ("sortedneighbourhood", "bremen", [1, 3]),
+    ],
+)
+def test_blocking_index_probes_categorical_key(method, value, expected):
+    # Categories in first-appearance order, not in the order of their values
+    cities = ["zurich", "koln", "aachen", "berlin"]
+    df = pd.DataFrame({"city": pd.Categorical(cities, categories=cities)})
+    blocking_index = BlockingIndex(df, ["city"], method)
+    assert blocking_index.probe(pd.Series({"city": value})).tolist() == expected
+
+
+def test_service_loads_the_model_of_each_dataset(tmp_path):
+    model_path = tmp_path / "model.pkl"
+    joblib.dump("model of syn1", Classifier.get_model_path(model_path, "syn1"))
+    service = MatchService(None, str(model_path))
+    assert service.load_classifier("syn1") == "model of syn1"
+    assert service.load_classifier("syn2") is None
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        b"[1, 2]",
+        b'"record"',
+        b'{"record": {"city": "kiel"}, "limit": "a"}',
+        b'{"record": {"city": "kiel"}, "limit": 0}',
+    ],
+)
+def test_invalid_match_requests_are_bad_requests(body):
+    service = MatchService(None)
+    service.datasets = {"ds": None}
+    status, response = asyncio.run(service.handle_request("POST", "/match", body))
+    assert status == 400
+    assert "error" in response
+
+
+async def send_raw_request(service: MatchService, request: bytes) -> bytes:
+    server = await asyncio.start_server(service.handle_connection, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(request)
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+    return response
+
+
+@pytest.mark.parametrize("content_length", [b"abc", b"-1"])
+def test_invalid_content_length_is_a_bad_request(content_length):
+    service = MatchService(None)
+    response = asyncio.run(
+        send_raw_request(
+            service,
+            b"POST /match HTTP/1.1\r\nContent-Length: "
+            + content_length
+            + b"\r\n\r\n{}",
+        )
+    )
+    assert response.startswith(b"HTTP/1.1 400 Bad Request")
@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from memory_utils import compact_df, string_dtype
+from preprocessor import is_text_column
+
+
+@pytest.mark.parametrize(
+    "values, expected",
+    [
+        (["anna", None, "ben", "anna"], True),
+        (["anna", "ben", "clara", "david"], True),
+        ([1.5, np.nan, 2.5, 1.5], False),
+        ([None, None, None, None], False),
+    ],
+)
+def test_text_detection_does_not_depend_on_representation(values, expected):
+    column = pd.Series(values, dtype=object if expected else None)
+    assert is_text_column(column) == expected
+    assert is_text_column(column.astype("category")) == expected
+    assert is_text_column(compact_df(column.to_frame("col"))["col"]) == expected
+    if expected:
+        assert is_text_column(column.astype(string_dtype()))